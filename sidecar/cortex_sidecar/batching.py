@@ -0,0 +1,264 @@
+"""Micro-batching of concurrent embedding work for Cortex sidecar.
+
+Single-text callers (e.g. one /embed request per note) would otherwise each
+pay for a batch-of-one forward pass and a one-row LanceDB commit.
+EmbedBatcher queues those texts and encodes whatever arrives within a short
+window in one call; TableWriter does the same for appends to a table.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+
+import numpy as np
+import pyarrow as pa
+from lancedb.table import Table
+
+from cortex_sidecar.embedding import EMBED_BATCH_SIZE, encode_texts_async
+
+logger = logging.getLogger("cortex-sidecar")
+
+# How long the first queued text waits for company before its batch runs
+EMBED_BATCH_WINDOW_SECONDS = 0.005
+
+# Recently encoded texts kept in memory (override with CORTEX_EMBED_CACHE_SIZE)
+EMBED_CACHE_SIZE = int(os.environ.get("CORTEX_EMBED_CACHE_SIZE", "4096"))
+
+# How long the first queued write waits for company before it is committed
+WRITE_BATCH_WINDOW_SECONDS = 0.02
+
+# Rows after which queued writes are committed without waiting further
+WRITE_BATCH_MAX_ROWS = 256
+
+
+class EmbedBatcher:
+    """Coalesce concurrent single-text encodes into batched model calls.
+
+    Vectors for the most recently encoded texts are kept in an LRU cache,
+    so re-embedding a just-saved note or repeating a search query skips
+    the model entirely.
+
+    Args:
+        model: The loaded SentenceTransformer, or None in test mode.
+        max_batch: Maximum texts per model call.
+        window: Seconds to wait for more texts after the first arrives.
+        cache_size: Number of text -> vector entries to keep (0 disables).
+    """
+
+    def __init__(
+        self,
+        model,
+        max_batch: int = EMBED_BATCH_SIZE,
+        window: float = EMBED_BATCH_WINDOW_SECONDS,
+        cache_size: int = EMBED_CACHE_SIZE,
+    ):
+        self.model = model
+        self.max_batch = max(max_batch, 1)
+        self.window = window
+        self.cache_size = max(cache_size, 0)
+        self._cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start the background batching task on the running event loop."""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._queue = queue
+        self._task = asyncio.create_task(self._run(queue))
+
+    async def stop(self) -> None:
+        """Cancel the batching task and fail any texts still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._queue is not None:
+            pending = []
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            _fail(pending, RuntimeError("embedding batcher stopped"))
+
+    async def encode(self, text: str) -> np.ndarray:
+        """Encode one text as part of the next batch.
+
+        Args:
+            text: The text to embed.
+
+        Returns:
+            A read-only float32 vector of length EMBEDDING_DIM.
+        """
+        if self._task is None or self._queue is None:
+            raise RuntimeError("embedding batcher is not running")
+        cached = self._cache.get(text)
+        if cached is not None:
+            self._cache.move_to_end(text)
+            return cached
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _collect(self, queue: asyncio.Queue, batch: list[tuple[str, asyncio.Future]]) -> None:
+        batch.append(await queue.get())
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.window
+        while len(batch) < self.max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except TimeoutError:
+                break
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        while True:
+            batch: list[tuple[str, asyncio.Future]] = []
+            try:
+                await self._collect(queue, batch)
+                vectors = await encode_texts_async(self.model, [text for text, _ in batch])
+            except asyncio.CancelledError:
+                _fail(batch, RuntimeError("embedding batcher stopped"))
+                raise
+            except Exception as e:
+                logger.error("Batched embedding failed: %s", e)
+                _fail(batch, e)
+                continue
+            for (text, future), vector in zip(batch, vectors):
+                # Own copy, so a cached row does not pin the whole batch array
+                vector = vector.copy()
+                vector.flags.writeable = False
+                self._remember(text, vector)
+                if not future.done():
+                    future.set_result(vector)
+
+    def _remember(self, text: str, vector: np.ndarray) -> None:
+        if not self.cache_size:
+            return
+        self._cache[text] = vector
+        self._cache.move_to_end(text)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+
+class TableWriter:
+    """Serialise appends to a LanceDB table through one background task.
+
+    Writers queue plain columns (a vector array plus a list per field).
+    Rows queued within a short window are merged column by column and
+    converted to Arrow once, as a single record batch committed with one
+    table.add() on a worker thread. The event loop never blocks on LanceDB
+    I/O and concurrent writers do not race on commits. If a merged write
+    fails, each request is retried alone, so invalid values only fail the
+    caller that sent them.
+
+    Args:
+        open_table: Returns the table to append to.
+        build_batch: Builds a record batch from (schema, vectors, columns).
+        max_rows: Commit once this many rows are queued.
+        window: Seconds to wait for more rows after the first arrive.
+    """
+
+    def __init__(
+        self,
+        open_table: Callable[[], Table],
+        build_batch: Callable[[pa.Schema, np.ndarray, dict[str, list]], pa.RecordBatch],
+        max_rows: int = WRITE_BATCH_MAX_ROWS,
+        window: float = WRITE_BATCH_WINDOW_SECONDS,
+    ):
+        self.open_table = open_table
+        self.build_batch = build_batch
+        self.max_rows = max(max_rows, 1)
+        self.window = window
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start the background writer task on the running event loop."""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._queue = queue
+        self._task = asyncio.create_task(self._run(queue))
+
+    async def stop(self) -> None:
+        """Commit everything queued so far, then stop the writer task."""
+        if self._task is None or self._queue is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def add(self, vectors: np.ndarray, columns: dict[str, list]) -> None:
+        """Queue rows and wait until they have been committed.
+
+        Args:
+            vectors: Array of shape (n, EMBEDDING_DIM).
+            columns: n values for every non-vector field, keyed by field name.
+        """
+        if self._task is None or self._queue is None:
+            raise RuntimeError("table writer is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(((vectors, columns), future))
+        await future
+
+    def _write(self, rows: list[tuple[np.ndarray, dict[str, list]]]) -> None:
+        vectors, columns = rows[0]
+        if len(rows) > 1:
+            vectors = np.concatenate([v for v, _ in rows])
+            columns = {name: [x for _, c in rows for x in c[name]] for name in columns}
+        table = self.open_table()
+        table.add(self.build_batch(table.schema, vectors, columns))
+
+    async def _commit(self, pending: list[tuple[tuple, asyncio.Future]]) -> None:
+        try:
+            await asyncio.to_thread(self._write, [rows for rows, _ in pending])
+        except Exception as e:
+            if len(pending) > 1:
+                # One request's bad values must not fail everyone it was
+                # merged with: commit each request on its own instead
+                logger.warning("Batched table write failed, retrying per request: %s", e)
+                for item in pending:
+                    await self._commit([item])
+                return
+            logger.error("Table write failed: %s", e)
+            _fail(pending, e)
+            return
+        for _, future in pending:
+            if not future.done():
+                future.set_result(None)
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await queue.get()
+            if item is None:
+                return
+            pending = [item]
+            rows = len(item[0][0])
+            deadline = loop.time() + self.window
+            while rows < self.max_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                pending.append(item)
+                rows += len(item[0][0])
+            await self._commit(pending)
+
+
+def _fail(items: Sequence[tuple[object, asyncio.Future]], exc: BaseException) -> None:
+    for _, future in items:
+        if not future.done():
+            future.set_exception(exc)
@@ -9,16 +9,29 @@ Provides multiple chunking strategies:
 
 from __future__ import annotations
 
+import hashlib
 import logging
+import re
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 
-from tree_sitter import Language, Parser
+import numpy as np
+from tree_sitter import Language, Parser, Query, QueryCursor, Tree
 
 logger = logging.getLogger("cortex-sidecar")
 
 # Maximum chunk size in characters before falling back to word-window splitting
 MAX_CHUNK_CHARS = 8000
 
+# A "word" for word-window chunking is any run of non-whitespace characters.
+# Lookup table of the code points str.isspace() (and regex \s) treat as
+# whitespace. U+3000 is the highest of them, so code points are clamped to
+# the trailing False entry at U+3001 before indexing.
+_WHITESPACE_LAST = 0x3000
+_IS_WHITESPACE = np.zeros(_WHITESPACE_LAST + 2, dtype=bool)
+_IS_WHITESPACE[[cp for cp in range(_WHITESPACE_LAST + 1) if chr(cp).isspace()]] = True
+
 
 @dataclass
 class Chunk:
@@ -37,6 +50,55 @@ class Chunk:
 # Word-window fallback
 # ---------------------------------------------------------------------------
 
+def _word_offsets(text: str) -> tuple[np.ndarray, np.ndarray]:
+    """Locate every whitespace-delimited word in text.
+
+    The text is viewed as an array of code points and word boundaries are
+    found as transitions in a vectorised whitespace mask, so no Python
+    object is created per word. The mask is padded with a non-word entry
+    on each side, so transitions alternate start, end, start, end, ...
+
+    Args:
+        text: The input text.
+
+    Returns:
+        Two arrays holding the start and end character offset of each word.
+    """
+    codepoints = np.frombuffer(
+        text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32
+    )
+    is_word = np.zeros(len(codepoints) + 2, dtype=bool)
+    np.logical_not(
+        _IS_WHITESPACE.take(np.minimum(codepoints, _WHITESPACE_LAST + 1)),
+        out=is_word[1:-1],
+    )
+    edges = np.flatnonzero(is_word[1:] != is_word[:-1])
+    return edges[0::2], edges[1::2]
+
+
+def _window_bounds(
+    n_words: int, chunk_size: int, overlap: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Compute the first and last word index of every window up front.
+
+    The window count is derived arithmetically, so no per-window check
+    against the end of the input is needed.
+
+    Args:
+        n_words: Total number of words in the input.
+        chunk_size: Maximum number of words per chunk (at least 1 is used).
+        overlap: Number of overlapping words between chunks.
+
+    Returns:
+        Arrays of the first and last (inclusive) word index per window.
+    """
+    chunk_size = max(chunk_size, 1)
+    step = max(chunk_size - overlap, 1)
+    n_windows = 1 + max(0, -(-(n_words - chunk_size) // step))
+    first = np.arange(0, n_windows * step, step)
+    return first, np.minimum(first + chunk_size, n_words) - 1
+
+
 def chunk_text(
     text: str,
     chunk_size: int = 500,
@@ -44,6 +106,12 @@ def chunk_text(
 ) -> list[Chunk]:
     """Split text into overlapping word-window chunks.
 
+    Word boundaries are located with a single vectorised scan and each chunk
+    is one slice of the original text, from the first character of its first
+    word to the last character of its last word. Whitespace between words
+    inside a chunk is kept as it appears in the source rather than being
+    collapsed to single spaces.
+
     Args:
         text: The input text to chunk.
         chunk_size: Maximum number of words per chunk.
@@ -52,27 +120,17 @@ def chunk_text(
     Returns:
         A list of Chunk objects.
     """
-    words = text.split()
-    if not words:
+    starts, ends = _word_offsets(text)
+    if not len(starts):
         return []
 
-    chunks: list[Chunk] = []
-    start = 0
-    chunk_index = 0
-
-    while start < len(words):
-        end = min(start + chunk_size, len(words))
-        chunk_text_str = " ".join(words[start:end])
-        chunks.append(Chunk(text=chunk_text_str, index=chunk_index))
-
-        if end == len(words):
-            break
-
-        step = max(chunk_size - overlap, 1)
-        start += step
-        chunk_index += 1
-
-    return chunks
+    first, last = _window_bounds(len(starts), chunk_size, overlap)
+    return [
+        Chunk(text=text[start:end], index=i)
+        for i, (start, end) in enumerate(
+            zip(starts[first].tolist(), ends[last].tolist())
+        )
+    ]
 
 
 # ---------------------------------------------------------------------------
@@ -103,9 +161,27 @@ _CODE_NODE_TYPES: dict[str, set[str]] = {
     },
 }
 
+# Root node type of each grammar. Definition queries are anchored to it so
+# only direct children of the root (top-level definitions) are captured.
+_ROOT_NODE_TYPES: dict[str, str] = {
+    "python": "module",
+    "javascript": "program",
+    "typescript": "program",
+    "tsx": "program",
+    "rust": "source_file",
+}
+
 # Maps language name to tree-sitter language objects.
 _TS_LANGUAGES: dict[str, Language] = {}
 
+# Compiled top-level definition query per language.
+_TS_QUERIES: dict[str, Query] = {}
+
+# One reusable parser per language. A parser is not safe to use from two
+# threads at once, so each has a lock that is held while parsing.
+_TS_PARSERS: dict[str, Parser] = {}
+_TS_PARSER_LOCKS: dict[str, threading.Lock] = {}
+
 
 def _get_ts_language(lang: str) -> Language | None:
     """Lazily load and cache tree-sitter language objects.
@@ -147,11 +223,219 @@ def _get_ts_language(lang: str) -> Language | None:
     return None
 
 
-def _extract_name(node, source_bytes: bytes) -> str | None:
+def _get_ts_parser(lang: str) -> Parser | None:
+    """Lazily create and cache a parser for a language.
+
+    Args:
+        lang: The language identifier (e.g., 'python', 'rust').
+
+    Returns:
+        A tree_sitter.Parser if the grammar is available, else None.
+    """
+    parser = _TS_PARSERS.get(lang)
+    if parser is not None:
+        return parser
+
+    ts_lang = _get_ts_language(lang)
+    if ts_lang is None:
+        return None
+    if lang in _CODE_NODE_TYPES:
+        _TS_QUERIES.setdefault(lang, _build_definition_query(lang, ts_lang))
+    _TS_PARSER_LOCKS.setdefault(lang, threading.Lock())
+    return _TS_PARSERS.setdefault(lang, Parser(ts_lang))
+
+
+def _build_definition_query(lang: str, ts_lang: Language) -> Query:
+    """Compile a query capturing top-level definition nodes as @def.
+
+    Args:
+        lang: The language identifier.
+        ts_lang: The tree-sitter language to compile against.
+
+    Returns:
+        A compiled tree_sitter.Query.
+    """
+    alternatives = " ".join(f"({t})" for t in sorted(_CODE_NODE_TYPES[lang]))
+    return Query(ts_lang, f"({_ROOT_NODE_TYPES[lang]} [{alternatives}] @def)")
+
+
+def _top_level_definitions(lang: str, root) -> list:
+    """Collect top-level definition nodes of a parsed tree in source order.
+
+    Matching runs inside tree-sitter's query engine. The start depth is
+    capped at the root so the cursor never descends into nested scopes.
+
+    Args:
+        lang: The language identifier.
+        root: The root node of the parsed tree.
+
+    Returns:
+        The matching child nodes of root, ordered by start byte.
+    """
+    cursor = QueryCursor(_TS_QUERIES[lang])
+    cursor.set_max_start_depth(0)
+    nodes = cursor.captures(root).get("def", [])
+    return sorted(nodes, key=lambda n: n.start_byte)
+
+
+def preload_languages() -> None:
+    """Load every supported grammar and build its parser.
+
+    Called at sidecar startup so the first ingest per language does not pay
+    for importing the grammar module and constructing a parser.
+    """
+    for lang in sorted(_CODE_LANGUAGES):
+        _get_ts_parser(lang)
+
+
+# Most recent parse per (language, file_path): (SHA-256 of content, source
+# bytes, tree). Re-ingesting an unchanged file reuses its tree; a changed file
+# is reparsed incrementally from the previous tree.
+_TREE_CACHE_SIZE = 512
+_TREE_CACHE: OrderedDict[tuple[str, str], tuple[bytes, bytes, Tree]] = OrderedDict()
+
+
+def _common_prefix_len(a: bytes, b: bytes) -> int:
+    """Length of the common prefix of two byte strings.
+
+    Binary search over slice comparisons keeps the byte comparisons in C.
+    """
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_suffix_len(a: bytes, b: bytes, limit: int) -> int:
+    """Length of the common suffix of two byte strings, capped at limit."""
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len(a) - mid:] == b[len(b) - mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _point_at(source_bytes: bytes, offset: int) -> tuple[int, int]:
+    """Convert a byte offset to a tree-sitter (row, column) point."""
+    row = source_bytes.count(b"\n", 0, offset)
+    column = offset - (source_bytes.rfind(b"\n", 0, offset) + 1)
+    return row, column
+
+
+def _reparse_incremental(
+    parser: Parser, old_tree: Tree, old_bytes: bytes, new_bytes: bytes
+) -> Tree:
+    """Reparse new_bytes, reusing the unchanged parts of old_tree.
+
+    The difference between the two sources is described as a single edit
+    spanning everything between their common prefix and common suffix.
+
+    Args:
+        parser: A parser for the tree's language.
+        old_tree: The tree previously parsed from old_bytes. It may still be
+            in use by other callers, so only a copy of it is edited.
+        old_bytes: The source old_tree was parsed from.
+        new_bytes: The new source to parse.
+
+    Returns:
+        The tree for new_bytes.
+    """
+    start = _common_prefix_len(old_bytes, new_bytes)
+    suffix = _common_suffix_len(
+        old_bytes, new_bytes, min(len(old_bytes), len(new_bytes)) - start
+    )
+    old_end = len(old_bytes) - suffix
+    new_end = len(new_bytes) - suffix
+
+    edited = old_tree.copy()
+    edited.edit(
+        start_byte=start,
+        old_end_byte=old_end,
+        new_end_byte=new_end,
+        start_point=_point_at(old_bytes, start),
+        old_end_point=_point_at(old_bytes, old_end),
+        new_end_point=_point_at(new_bytes, new_end),
+    )
+    return parser.parse(new_bytes, edited)
+
+
+def _parse_cached(
+    parser: Parser, language: str, file_path: str, source_bytes: bytes
+) -> Tree:
+    """Parse source bytes, reusing the previous parse of the same file.
+
+    Unchanged content returns the cached tree as-is. Changed content is
+    reparsed incrementally from the previous tree, so only the edited
+    region is re-analysed. Files seen for the first time get a full parse.
+
+    Args:
+        parser: The cached parser for the language.
+        language: The language identifier, part of the cache key.
+        file_path: Path to the file, part of the cache key.
+        source_bytes: The UTF-8 encoded source.
+
+    Returns:
+        The parsed tree-sitter Tree.
+    """
+    key = (language, file_path)
+    digest = hashlib.sha256(source_bytes).digest()
+
+    # The per-language lock guards the shared parser and the cache entry.
+    # Cached trees are handed out to callers that read them without the
+    # lock, so they are never mutated: an incremental reparse edits a copy.
+    with _TS_PARSER_LOCKS[language]:
+        cached = _TREE_CACHE.get(key)
+        if cached is not None and cached[0] == digest:
+            _TREE_CACHE.move_to_end(key)
+            return cached[2]
+
+        if cached is not None:
+            _, old_bytes, old_tree = cached
+            tree = _reparse_incremental(parser, old_tree, old_bytes, source_bytes)
+        else:
+            tree = parser.parse(source_bytes)
+
+        _TREE_CACHE[key] = (digest, source_bytes, tree)
+        _TREE_CACHE.move_to_end(key)
+        if len(_TREE_CACHE) > _TREE_CACHE_SIZE:
+            _TREE_CACHE.popitem(last=False)
+        return tree
+
+
+def _source_slice(source: str, source_bytes: bytes, start: int, end: int) -> str:
+    """Return the text of a byte range of the source.
+
+    A UTF-8 encoding is the same length as its source only when every
+    character is ASCII. In that case byte offsets are character offsets and
+    the range is sliced straight out of the str without decoding.
+
+    Args:
+        source: The original source string.
+        source_bytes: The UTF-8 encoding of source.
+        start: Start byte offset.
+        end: End byte offset (exclusive).
+
+    Returns:
+        The decoded text of the range.
+    """
+    if len(source) == len(source_bytes):
+        return source[start:end]
+    return source_bytes[start:end].decode("utf-8", errors="replace")
+
+
+def _extract_name(node, source: str, source_bytes: bytes) -> str | None:
     """Extract the name identifier from an AST node.
 
     Args:
         node: The tree-sitter node to extract from.
+        source: The original source string.
         source_bytes: The original source bytes.
 
     Returns:
@@ -159,9 +443,7 @@ def _extract_name(node, source_bytes: bytes) -> str | None:
     """
     for child in node.children:
         if child.type == "identifier" or child.type == "type_identifier":
-            return source_bytes[child.start_byte:child.end_byte].decode(
-                "utf-8", errors="replace"
-            )
+            return _source_slice(source, source_bytes, child.start_byte, child.end_byte)
     return None
 
 
@@ -185,8 +467,8 @@ def _build_context_header(
     return " | ".join(parts)
 
 
-def _chunk_type_from_node(node_type: str) -> str:
-    """Map a tree-sitter node type to a human-readable chunk type.
+def _classify_node_type(node_type: str) -> str:
+    """Derive a human-readable chunk type from a tree-sitter node type.
 
     Args:
         node_type: The raw tree-sitter node type string.
@@ -215,6 +497,29 @@ def _chunk_type_from_node(node_type: str) -> str:
     return "code"
 
 
+# Definition node types form a small closed set, so classify them all once
+_NODE_TYPE_TO_CHUNK: dict[str, str] = {
+    node_type: _classify_node_type(node_type)
+    for node_types in _CODE_NODE_TYPES.values()
+    for node_type in node_types
+}
+
+
+def _chunk_type_from_node(node_type: str) -> str:
+    """Map a tree-sitter node type to a human-readable chunk type.
+
+    Args:
+        node_type: The raw tree-sitter node type string.
+
+    Returns:
+        A human-readable chunk type (e.g., 'function', 'class').
+    """
+    chunk_type = _NODE_TYPE_TO_CHUNK.get(node_type)
+    if chunk_type is None:
+        chunk_type = _classify_node_type(node_type)
+    return chunk_type
+
+
 def chunk_code(
     source: str,
     language: str,
@@ -231,27 +536,19 @@ def chunk_code(
         A list of Chunk objects if successful, else None if the language
         is not supported or parsing fails.
     """
-    ts_lang = _get_ts_language(language)
-    if ts_lang is None:
+    parser = _get_ts_parser(language)
+    if parser is None:
         return None
 
-    target_types = _CODE_NODE_TYPES.get(language)
-    if target_types is None:
+    if language not in _TS_QUERIES:
         return None
 
-    parser = Parser(ts_lang)
     source_bytes = source.encode("utf-8")
-    tree = parser.parse(source_bytes)
+    tree = _parse_cached(parser, language, file_path, source_bytes)
     root = tree.root_node
 
     chunks: list[Chunk] = []
-    lines = source.splitlines(keepends=True)
-
-    # Collect top-level definition nodes
-    definition_nodes = []
-    for child in root.children:
-        if child.type in target_types:
-            definition_nodes.append(child)
+    definition_nodes = _top_level_definitions(language, root)
 
     if not definition_nodes:
         # No top-level definitions found — fall back
@@ -259,11 +556,7 @@ def chunk_code(
 
     # Collect preamble (imports, comments before first definition)
     first_start = definition_nodes[0].start_byte
-    preamble = (
-        source_bytes[:first_start]
-        .decode("utf-8", errors="replace")
-        .strip()
-    )
+    preamble = _source_slice(source, source_bytes, 0, first_start).strip()
 
     chunk_index = 0
 
@@ -279,11 +572,8 @@ def chunk_code(
         chunk_index += 1
 
     for node in definition_nodes:
-        node_text = (
-            source_bytes[node.start_byte:node.end_byte]
-            .decode("utf-8", errors="replace")
-        )
-        entity_name = _extract_name(node, source_bytes)
+        node_text = _source_slice(source, source_bytes, node.start_byte, node.end_byte)
+        entity_name = _extract_name(node, source, source_bytes)
         ctype = _chunk_type_from_node(node.type)
         start_line = node.start_point[0] + 1  # 1-indexed
         end_line = node.end_point[0] + 1
@@ -319,13 +609,55 @@ def chunk_code(
     return chunks
 
 
+def _line_sections(
+    source: str, offsets: list[int]
+) -> list[tuple[int, int, int, int]]:
+    """Split source into sections starting at the given line-start offsets.
+
+    Line numbers are counted incrementally between consecutive offsets, so
+    the whole source is scanned for newlines only once.
+
+    Args:
+        source: The full source string.
+        offsets: Ascending character offsets, each at the start of a line.
+
+    Returns:
+        (start_offset, end_offset, start_line, end_line) for each section,
+        with 1-indexed inclusive line numbers.
+    """
+    total_lines = source.count("\n") + (not source.endswith("\n"))
+    start_lines: list[int] = []
+    line, prev = 1, 0
+    for offset in offsets:
+        line += source.count("\n", prev, offset)
+        prev = offset
+        start_lines.append(line)
+
+    ends = offsets[1:] + [len(source)]
+    end_lines = [start - 1 for start in start_lines[1:]] + [total_lines]
+    return list(zip(offsets, ends, start_lines, end_lines))
+
+
+def _line_at(source: str, offset: int) -> str:
+    """Return the line of source starting at offset, without its newline."""
+    end = source.find("\n", offset)
+    return source[offset:] if end == -1 else source[offset:end]
+
+
 # ---------------------------------------------------------------------------
 # Markdown heading-based chunking
 # ---------------------------------------------------------------------------
 
+# A heading line: first non-whitespace character is '#'
+_MD_HEADING_RE = re.compile(r"^[^\S\n]*#", re.MULTILINE)
+
+
 def chunk_markdown(source: str, file_path: str = "") -> list[Chunk]:
     """Chunk Markdown by heading boundaries.
 
+    Heading lines are located with one multiline regex scan over the whole
+    source; section text is sliced directly from the source between them.
+
     Args:
         source: The Markdown source string.
         file_path: Optional path to the file.
@@ -333,40 +665,29 @@ def chunk_markdown(source: str, file_path: str = "") -> list[Chunk]:
     Returns:
         A list of Chunk objects split by headings.
     """
-    lines = source.splitlines(keepends=True)
-    if not lines:
+    if not source:
         return []
 
-    sections: list[tuple[str | None, int, list[str]]] = []
-    current_heading: str | None = None
-    current_start = 1
-    current_lines: list[str] = []
-
-    for i, line in enumerate(lines):
-        stripped = line.strip()
-        if stripped.startswith("#"):
-            # Save previous section
-            if current_lines:
-                sections.append((current_heading, current_start, current_lines))
-            current_heading = stripped.lstrip("#").strip()
-            current_start = i + 1
-            current_lines = [line]
-        else:
-            current_lines.append(line)
-
-    if current_lines:
-        sections.append((current_heading, current_start, current_lines))
+    offsets = [m.start() for m in _MD_HEADING_RE.finditer(source)]
+    # Content before the first heading forms an untitled section
+    has_intro = not offsets or offsets[0] != 0
+    if has_intro:
+        offsets.insert(0, 0)
 
     chunks: list[Chunk] = []
-    for idx, (heading, start_line, section_lines) in enumerate(sections):
-        text = "".join(section_lines).strip()
+    sections = _line_sections(source, offsets)
+    for idx, (start, end, start_line, end_line) in enumerate(sections):
+        text = source[start:end].strip()
         if not text:
             continue
+        heading = None
+        if idx > 0 or not has_intro:
+            heading = _line_at(source, start).strip().lstrip("#").strip()
         chunks.append(Chunk(
             text=text,
             index=idx,
             start_line=start_line,
-            end_line=start_line + len(section_lines) - 1,
+            end_line=end_line,
             entity_name=heading,
             chunk_type="section",
             context_header=_build_context_header(file_path, heading, "section"),
@@ -379,9 +700,24 @@ def chunk_markdown(source: str, file_path: str = "") -> list[Chunk]:
 # Config file chunking (YAML/TOML/JSON — simple line-based top-level split)
 # ---------------------------------------------------------------------------
 
+# A top-level key line: starts at column 0 with a character that is neither
+# whitespace nor a '#' comment, and is not a '//' comment. The pattern
+# begins with a literal newline so the regex engine can jump between line
+# breaks instead of testing '^' at every character; it is matched against
+# the source with a '\n' prepended, which makes each match start equal to
+# the line's offset in the original source.
+_CONFIG_KEY_LINE_RE = re.compile(r"\n(?!//)[^\s#]")
+
+# Key name: everything on the line before the first ':' or '='
+_CONFIG_KEY_RE = re.compile(r"[^:=\n]*")
+
+
 def chunk_config(source: str, file_path: str = "") -> list[Chunk]:
     """Chunk config files by top-level keys.
 
+    Top-level key lines are located with one multiline regex scan; content
+    before the first key is dropped.
+
     Args:
         source: The config file source string.
         file_path: Optional path to the file.
@@ -389,55 +725,32 @@ def chunk_config(source: str, file_path: str = "") -> list[Chunk]:
     Returns:
         A list of Chunk objects split by top-level keys.
     """
-    lines = source.splitlines(keepends=True)
-    if not lines:
+    offsets = [m.start() for m in _CONFIG_KEY_LINE_RE.finditer("\n" + source)]
+    if not offsets:
         return []
 
-    sections: list[tuple[str, int, list[str]]] = []
-    current_key: str | None = None
-    current_start = 1
-    current_lines: list[str] = []
-
-    for i, line in enumerate(lines):
-        stripped = line.rstrip()
-        # Top-level key: starts at column 0, not a comment, not blank
-        is_top_level = (
-            stripped
-            and not stripped[0].isspace()
-            and not stripped.startswith("#")
-            and not stripped.startswith("//")
-        )
-        if is_top_level:
-            if current_lines and current_key is not None:
-                sections.append((current_key, current_start, current_lines))
-            # Extract key name (before : or =)
-            key = (
-                stripped.split(":")[0]
-                .split("=")[0]
-                .strip()
-                .strip("[]")
-                .strip('"')
-                .strip("'")
-            )
-            current_key = key
-            current_start = i + 1
-            current_lines = [line]
-        else:
-            current_lines.append(line)
-
-    if current_lines and current_key is not None:
-        sections.append((current_key, current_start, current_lines))
-
     chunks: list[Chunk] = []
-    for idx, (key, start_line, section_lines) in enumerate(sections):
-        text = "".join(section_lines).strip()
+    sections = _line_sections(source, offsets)
+    for idx, (start, end, start_line, end_line) in enumerate(sections):
+        text = source[start:end].strip()
         if not text:
             continue
+        # Extract key name (before : or =); the pattern can match empty,
+        # so it always matches
+        key_match = _CONFIG_KEY_RE.match(source, start)
+        assert key_match is not None
+        key = (
+            key_match.group()
+            .strip()
+            .strip("[]")
+            .strip('"')
+            .strip("'")
+        )
         chunks.append(Chunk(
             text=text,
             index=idx,
             start_line=start_line,
-            end_line=start_line + len(section_lines) - 1,
+            end_line=end_line,
             entity_name=key,
             chunk_type="config",
             context_header=_build_context_header(file_path, key, "config"),
@@ -0,0 +1,186 @@
+"""Embedding helpers for Cortex sidecar.
+
+Wraps the sentence-transformer model so callers can encode many texts in a
+single batched forward pass instead of one model call per chunk, and run
+that inference off the asyncio event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Literal
+
+import numpy as np
+
+logger = logging.getLogger("cortex-sidecar")
+
+EMBED_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# Output dimension of all-MiniLM-L6-v2
+EMBEDDING_DIM = 384
+
+# Distance metric shared by the ANN index and every vector query
+VECTOR_METRIC: Literal["cosine"] = "cosine"
+
+# ANN query defaults: IVF partitions probed per query, and how many times
+# `limit` candidates are re-ranked with full vectors to undo quantisation error.
+# Both are ignored while the table is still searched by flat scan.
+SEARCH_NPROBES = 20
+SEARCH_REFINE_FACTOR = 10
+
+# Optional two-stage search (CORTEX_SEARCH_BINARY=1): a Hamming-distance
+# search over 48-byte sign codes (IVF_FLAT-indexed once the table is large
+# enough), then exact cosine rescoring of this many times `limit`
+# candidates. Only tables created while it is on store the codes. Off by
+# default: 384-dim sign codes lose more recall than the SQ8 index.
+SEARCH_BINARY = os.environ.get("CORTEX_SEARCH_BINARY") == "1"
+SEARCH_BINARY_OVERSAMPLE = 8
+
+# Number of texts per forward pass (override with CORTEX_EMBED_BATCH_SIZE)
+EMBED_BATCH_SIZE = int(os.environ.get("CORTEX_EMBED_BATCH_SIZE", "32"))
+
+# Inference runs on one dedicated worker thread. The model already spreads a
+# forward pass across cores through torch/BLAS, so more workers would only
+# oversubscribe the CPU; a single worker keeps the event loop free.
+_EMBED_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cortex-embed")
+
+
+# Inference backend (override with CORTEX_EMBED_BACKEND): "torch", or the
+# "onnx"/"openvino" runtimes, which need sentence-transformers[onnx] or
+# sentence-transformers[openvino] installed
+EMBED_BACKEND = os.environ.get("CORTEX_EMBED_BACKEND", "torch").lower()
+
+# Model file per runtime backend (override with CORTEX_EMBED_MODEL_FILE).
+# The ONNX default is the int8 export the model repo ships for AVX-512 VNNI
+# CPUs; an empty value picks the backend's full-precision export.
+_BACKEND_MODEL_FILES = {
+    "onnx": "onnx/model_qint8_avx512_vnni.onnx",
+    "openvino": "openvino/openvino_model_qint8_quantized.xml",
+}
+
+
+def _cpu_threads() -> int:
+    # One thread per physical core; hyperthreads only contend for the
+    # same vector units during GEMMs
+    default = max((os.cpu_count() or 2) // 2, 1)
+    return int(os.environ.get("CORTEX_EMBED_THREADS", default))
+
+
+def _load_runtime_model(device: str | None):
+    from sentence_transformers import SentenceTransformer
+
+    file_name = os.environ.get(
+        "CORTEX_EMBED_MODEL_FILE", _BACKEND_MODEL_FILES[EMBED_BACKEND]
+    )
+    model_kwargs = {"file_name": file_name} if file_name else None
+    return SentenceTransformer(
+        EMBED_MODEL_NAME, device=device, backend=EMBED_BACKEND, model_kwargs=model_kwargs
+    )
+
+
+def load_model():
+    """Load the sentence-transformer embedding model.
+
+    The device can be forced with CORTEX_EMBED_DEVICE (e.g. "cpu", "cuda");
+    by default sentence-transformers picks CUDA or MPS when available. On
+    CUDA the weights are converted to float16 for higher throughput; on CPU
+    torch is limited to one thread per physical core (CORTEX_EMBED_THREADS).
+
+    With CORTEX_EMBED_BACKEND set to "onnx" or "openvino" the model runs
+    on that runtime instead, int8-quantised by default. If the runtime
+    cannot be loaded, the PyTorch model is used.
+
+    Returns:
+        The loaded SentenceTransformer.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    device = os.environ.get("CORTEX_EMBED_DEVICE") or None
+    if EMBED_BACKEND in _BACKEND_MODEL_FILES:
+        try:
+            model = _load_runtime_model(device)
+            logger.info("Embedding model loaded with %s backend", EMBED_BACKEND)
+            return model
+        except Exception as e:
+            logger.warning(
+                "Could not load %s embedding backend, using torch: %s", EMBED_BACKEND, e
+            )
+    elif EMBED_BACKEND != "torch":
+        logger.warning("Unknown CORTEX_EMBED_BACKEND %r, using torch", EMBED_BACKEND)
+
+    model = SentenceTransformer(EMBED_MODEL_NAME, device=device)
+    if model.device.type == "cuda":
+        model.half()
+    elif model.device.type == "cpu":
+        import torch
+
+        torch.set_num_threads(_cpu_threads())
+    logger.info("Embedding model loaded on %s", model.device)
+    return model
+
+
+_MOCK_VECTOR = np.full(EMBEDDING_DIM, 0.1, dtype=np.float32)
+_MOCK_VECTOR.flags.writeable = False
+
+
+def encode_texts(model, texts: list[str]) -> np.ndarray:
+    """Encode a list of texts with batched forward passes.
+
+    Identical texts (shared imports, license headers, empty sections) are
+    encoded once and the resulting vector is reused for every occurrence.
+
+    Args:
+        model: The loaded SentenceTransformer, or None in test mode.
+        texts: The texts to embed.
+
+    Returns:
+        A float32 array of shape (len(texts), EMBEDDING_DIM).
+    """
+    if model is None:
+        # Mock vectors for tests: a read-only broadcast view of one shared
+        # row, so no per-text memory is allocated
+        return np.broadcast_to(_MOCK_VECTOR, (len(texts), EMBEDDING_DIM))
+
+    positions: dict[str, int] = {}
+    inverse = [positions.setdefault(text, len(positions)) for text in texts]
+    vectors = model.encode(
+        list(positions),
+        batch_size=EMBED_BATCH_SIZE,
+        convert_to_numpy=True,
+        normalize_embeddings=False,
+        show_progress_bar=False,
+    )
+    if len(positions) == len(texts):
+        return vectors
+    return vectors[inverse]
+
+
+def binary_codes(vectors: np.ndarray) -> np.ndarray:
+    """Pack the sign bit of every vector component into bytes.
+
+    Args:
+        vectors: Array of shape (..., EMBEDDING_DIM).
+
+    Returns:
+        A uint8 array of shape (..., EMBEDDING_DIM // 8).
+    """
+    return np.packbits(vectors > 0, axis=-1)
+
+
+async def encode_texts_async(model, texts: list[str]) -> np.ndarray:
+    """Encode texts on the embedding worker thread.
+
+    Args:
+        model: The loaded SentenceTransformer, or None in test mode.
+        texts: The texts to embed.
+
+    Returns:
+        A float32 array of shape (len(texts), EMBEDDING_DIM).
+    """
+    if model is None:
+        return encode_texts(None, texts)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_EMBED_POOL, encode_texts, model, texts)
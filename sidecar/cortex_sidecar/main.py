@@ -1,21 +1,40 @@
 import argparse
+import asyncio
+import hashlib
 import logging
+import math
 import os
 import re
 import sys
 from contextlib import asynccontextmanager
-from datetime import datetime
+from datetime import UTC, datetime
+from functools import cache
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 import uuid
 
 import lancedb
+import numpy as np
 import pyarrow as pa
+import pyarrow.compute as pc
 import uvicorn
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 
-from cortex_sidecar.chunking import chunk_file, chunk_text
+from cortex_sidecar.batching import EmbedBatcher, TableWriter
+from cortex_sidecar.chunking import Chunk, chunk_file, chunk_text, preload_languages
+from cortex_sidecar.embedding import (
+    EMBEDDING_DIM,
+    SEARCH_BINARY,
+    SEARCH_BINARY_OVERSAMPLE,
+    SEARCH_NPROBES,
+    SEARCH_REFINE_FACTOR,
+    VECTOR_METRIC,
+    binary_codes,
+    encode_texts_async,
+    load_model,
+)
+from cortex_sidecar.responses import ORJSONResponse
 from cortex_sidecar.routes.health import router as health_router
 from cortex_sidecar.routes.chat import router as chat_router
 from cortex_sidecar.agents.base import AgentManager
@@ -60,10 +79,26 @@ def sanitize_filter_value(field: str, value: str) -> str:
 
 
 def get_lancedb_schema() -> pa.Schema:
-    """Define the LanceDB embedding table schema."""
+    """Define the LanceDB embedding table schema.
+
+    Vectors are stored as float16, which halves storage and scan bandwidth
+    versus float32 at negligible recall cost for MiniLM embeddings. String
+    columns stay plain utf8: Lance already dictionary-encodes
+    low-cardinality strings on disk, lancedb cannot compare a
+    dictionary-typed column with a string literal in filters, and
+    source_file needs utf8 for its BTREE index. With SEARCH_BINARY on,
+    a vector_bq column holds the sign bits of each vector for the binary
+    first-stage search; otherwise it is not stored at all. Tables created
+    with an older schema (float32 vectors, plain utf8 columns, no
+    vector_bq) keep working; LanceDB casts inserts to the existing table's
+    schema.
+    """
+    vector_fields = [pa.field("vector", pa.list_(pa.float16(), EMBEDDING_DIM))]
+    if SEARCH_BINARY:
+        vector_fields.append(pa.field("vector_bq", pa.list_(pa.uint8(), EMBEDDING_DIM // 8)))
     return pa.schema(
-        [
-            pa.field("vector", pa.list_(pa.float32(), 384)),
+        vector_fields
+        + [
             pa.field("text", pa.utf8()),
             pa.field("source_type", pa.utf8()),
             pa.field("source_file", pa.utf8()),
@@ -79,9 +114,203 @@ def get_lancedb_schema() -> pa.Schema:
     )
 
 
+# IVF partitions need enough rows to train; below this a flat scan is cheap
+VECTOR_INDEX_MIN_ROWS = 256
+
+
+# Rows appended after which the index is refreshed in the background
+VECTOR_REINDEX_EVERY_ROWS = 4096
+
+
+# ANN index kind (override with CORTEX_VECTOR_INDEX): "ivf_hnsw_sq" keeps an
+# int8 scalar-quantised copy of each vector behind an HNSW graph per
+# partition; "ivf_pq" trades some recall for a much smaller index.
+VECTOR_INDEX_TYPE = os.environ.get("CORTEX_VECTOR_INDEX", "ivf_hnsw_sq").lower()
+
+# Target rows per IVF partition for the HNSW index; the graph does the
+# fine-grained search, so a personal corpus usually needs one partition
+VECTOR_HNSW_PARTITION_ROWS = 1 << 20
+
+
+def _has_vector_index(table, column: str = "vector") -> bool:
+    return any(idx.columns == [column] for idx in table.list_indices())
+
+
+def _vector_index_params(rows: int) -> dict[str, Any]:
+    # Keyword form of create_index(), which every supported lancedb
+    # release accepts (the config= form is newer than the locked one)
+    if VECTOR_INDEX_TYPE == "ivf_pq":
+        return {
+            "index_type": "IVF_PQ",
+            "num_partitions": int(math.sqrt(rows)),
+            "num_sub_vectors": 48,
+        }
+    if VECTOR_INDEX_TYPE != "ivf_hnsw_sq":
+        raise ValueError(f"Unknown CORTEX_VECTOR_INDEX: {VECTOR_INDEX_TYPE!r}")
+    return {
+        "index_type": "IVF_HNSW_SQ",
+        "num_partitions": math.ceil(rows / VECTOR_HNSW_PARTITION_ROWS),
+    }
+
+
+def ensure_vector_index(table) -> bool:
+    """Build ANN indexes on the vector columns once the table is big enough.
+
+    The default IVF_HNSW_SQ index stores vectors as int8 (scalar
+    quantisation), so distance math in the graph touches a quarter of the
+    bytes of float32. With VECTOR_INDEX_TYPE = "ivf_pq", partitions scale
+    with sqrt(rows) and 48 sub-vectors split the 384 dims into 8-dim
+    subspaces. A vector_bq column, if the table has one, gets an IVF_FLAT
+    Hamming index with sqrt(rows) partitions, so the binary first stage
+    probes a few partitions instead of scanning every code. Existing
+    indexes are left as is.
+
+    Args:
+        table: The LanceDB embeddings table.
+
+    Returns:
+        True if the table has a vector index after the call.
+    """
+    needs_binary = (
+        "vector_bq" in table.schema.names and not _has_vector_index(table, "vector_bq")
+    )
+    has_vector = _has_vector_index(table)
+    if has_vector and not needs_binary:
+        return True
+    rows = table.count_rows()
+    if rows < VECTOR_INDEX_MIN_ROWS:
+        logger.info("Skipping vector index: %d rows (< %d)", rows, VECTOR_INDEX_MIN_ROWS)
+        return has_vector
+    if not has_vector:
+        table.create_index(
+            metric=VECTOR_METRIC, vector_column_name="vector", **_vector_index_params(rows)
+        )
+    if needs_binary:
+        table.create_index(
+            metric="hamming",
+            vector_column_name="vector_bq",
+            index_type="IVF_FLAT",
+            num_partitions=int(math.sqrt(rows)),
+        )
+    return True
+
+
+def ensure_source_file_index(table) -> bool:
+    """Build a BTREE scalar index on source_file if it is missing.
+
+    Per-file deletes (`source_file = ...`) and path-prefix filters then
+    look rows up in the index instead of scanning the whole column. Rows
+    appended later are folded in by optimize(); until then LanceDB scans
+    just those unindexed rows. Tables whose source_file is still
+    dictionary-encoded cannot be indexed and are left as is.
+
+    Args:
+        table: The LanceDB embeddings table.
+
+    Returns:
+        True if the table has a source_file index after the call.
+    """
+    if any(idx.columns == ["source_file"] for idx in table.list_indices()):
+        return True
+    if pa.types.is_dictionary(table.schema.field("source_file").type):
+        logger.info("Skipping source_file index: column is dictionary-encoded")
+        return False
+    table.create_scalar_index("source_file", index_type="BTREE")
+    return True
+
+
+def refresh_vector_index(table) -> None:
+    """Bring the vector index up to date with recently appended rows.
+
+    Builds the index once the table is large enough; after that, optimize()
+    compacts fragments and folds unindexed rows into the existing index.
+
+    Args:
+        table: The LanceDB embeddings table.
+    """
+    if _has_vector_index(table):
+        table.optimize()
+    elif ensure_vector_index(table):
+        logger.info("LanceDB vector index built on embeddings.vector")
+
+
+def _refresh_vector_index_quietly(table) -> None:
+    try:
+        refresh_vector_index(table)
+    except Exception as e:
+        logger.warning("Could not refresh LanceDB vector index: %s", e)
+
+
+def _schedule_index_refresh(rows_added: int) -> None:
+    """Count appended rows and refresh the index off the event loop."""
+    state = app.state
+    state.rows_since_index_refresh += rows_added
+    if state.rows_since_index_refresh < VECTOR_REINDEX_EVERY_ROWS:
+        return
+    task = state.index_refresh_task
+    if task is not None and not task.done():
+        return
+    state.rows_since_index_refresh = 0
+    table = state.embeddings_table
+    state.index_refresh_task = asyncio.create_task(
+        asyncio.to_thread(_refresh_vector_index_quietly, table)
+    )
+
+
+def build_embedding_batch(
+    schema: pa.Schema, vectors: np.ndarray, columns: Dict[str, list]
+) -> pa.RecordBatch:
+    """Assemble an Arrow record batch for the embeddings table.
+
+    The vector column is built as one contiguous FixedSizeListArray over the
+    ndarray buffer rather than from per-row Python lists. The array is
+    converted to the column's storage dtype in NumPy, so Arrow wraps the
+    buffer as-is instead of running a second cast.
+
+    Args:
+        schema: Target table schema (pass table.schema so older float32
+            tables receive matching types).
+        vectors: Array of shape (n, EMBEDDING_DIM). The vector_bq codes,
+            if the schema has that column, are derived from it.
+        columns: Values for every non-vector field, keyed by field name.
+
+    Returns:
+        A RecordBatch matching the given schema.
+    """
+    vector_type = schema.field("vector").type
+    # Tables are float16 (current schema) or float32 (older tables)
+    value_dtype = np.float16 if pa.types.is_float16(vector_type.value_type) else np.float32
+    flat = pa.array(np.ascontiguousarray(vectors, dtype=value_dtype).reshape(-1))
+    arrays = []
+    for field in schema:
+        if field.name == "vector":
+            arrays.append(
+                pa.FixedSizeListArray.from_arrays(flat, type=vector_type)
+            )
+        elif field.name == "vector_bq":
+            codes = pa.array(binary_codes(vectors).reshape(-1))
+            arrays.append(pa.FixedSizeListArray.from_arrays(codes, type=field.type))
+        else:
+            arrays.append(pa.array(columns[field.name], type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def chunk_entity_id(file_path: str, chunk_index: int, text: str) -> str:
+    """Derive a stable entity id for an ingested chunk from its content.
+
+    Re-ingesting an unchanged chunk yields the same id, so ids no longer
+    churn between passes and no random bytes are drawn per chunk.
+    """
+    key = f"{file_path}\0{chunk_index}\0{text}".encode()
+    return hashlib.blake2b(key, digest_size=16).hexdigest()
+
+
 def get_data_dir() -> Path:
     """Resolve the application data directory (platform-aware).
 
+    CORTEX_DATA_DIR is read on every call so it can be changed at runtime;
+    the platform default is resolved once.
+
     Returns:
         Path object pointing to the application data directory.
     """
@@ -89,7 +318,11 @@ def get_data_dir() -> Path:
     env_dir = os.environ.get("CORTEX_DATA_DIR")
     if env_dir:
         return Path(env_dir)
+    return _default_data_dir()
 
+
+@cache
+def _default_data_dir() -> Path:
     # macOS: ~/Library/Application Support/com.cortex.app
     if sys.platform == "darwin":
         return (
@@ -109,6 +342,9 @@ class EmbedRequest(BaseModel):
     text: str
     metadata: Optional[Dict[str, Any]] = None
 
+class EmbedBatchRequest(BaseModel):
+    items: List[EmbedRequest]
+
 class IngestRequest(BaseModel):
     file_path: str
     content: str
@@ -153,31 +389,53 @@ async def lifespan(app: FastAPI):
     else:
         logger.info("Using existing 'embeddings' table")
 
+    # One handle for the process lifetime; reopening per request costs a
+    # manifest read, and sharing it keeps reads consistent with our writes
+    table = db.open_table("embeddings")
+
     app.state.lancedb = db
+    app.state.embeddings_table = table
     app.state.lancedb_schema = schema
     app.state.data_dir = data_dir
 
+    # Load tree-sitter grammars up front so the first ingest per language
+    # doesn't pay for it.
+    preload_languages()
+
     # Load embedding model
     # During tests, we might want to skip this or use a mock
     if os.environ.get("CORTEX_TEST_MODE") == "1":
         logger.info("Test mode: Using mock embedding model")
         app.state.model = None
     else:
-        from sentence_transformers import SentenceTransformer
         logger.info("Loading sentence-transformer model...")
-        app.state.model = SentenceTransformer("all-MiniLM-L6-v2")
+        app.state.model = load_model()
+
+    # Coalesce concurrent single-text /embed calls into batched encodes
+    app.state.embed_batcher = EmbedBatcher(app.state.model)
+    app.state.embed_batcher.start()
+
+    # Funnel every append through one writer so commits are batched and
+    # LanceDB I/O stays off the event loop
+    app.state.table_writer = TableWriter(
+        lambda: app.state.embeddings_table, build_embedding_batch
+    )
+    app.state.table_writer.start()
+
+    app.state.rows_since_index_refresh = 0
+    app.state.index_refresh_task = None
 
     # Ensure vector index exists for faster ANN search.
     try:
-        table = db.open_table("embeddings")
-        try:
-            table.create_index("vector")
-        except TypeError:
-            table.create_index(metric="cosine")
-        logger.info("LanceDB vector index ready on embeddings.vector")
+        if ensure_vector_index(table):
+            logger.info("LanceDB vector index ready on embeddings.vector")
     except Exception as e:
         # Non-fatal: some LanceDB versions may auto-manage index state.
         logger.warning("Could not ensure LanceDB vector index: %s", e)
+    try:
+        ensure_source_file_index(table)
+    except Exception as e:
+        logger.warning("Could not ensure LanceDB source_file index: %s", e)
 
     # Register and start agents
     agent_manager.register_agent(ResearchDaemon())
@@ -187,16 +445,58 @@ async def lifespan(app: FastAPI):
     yield
 
     await agent_manager.stop_all()
+    await app.state.embed_batcher.stop()
+    await app.state.table_writer.stop()
+    if app.state.index_refresh_task is not None:
+        await app.state.index_refresh_task
     logger.info("Sidecar shutting down")
 
-app = FastAPI(title="Cortex Sidecar", version="0.1.0", lifespan=lifespan)
+app = FastAPI(
+    title="Cortex Sidecar",
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 app.include_router(health_router)
 app.include_router(chat_router)
 
+def _embed_columns(items: List[EmbedRequest], now: str) -> Dict[str, list]:
+    """Build embeddings-table column values for /embed style requests.
+
+    Args:
+        items: The embed requests, one row each.
+        now: ISO timestamp used for created_at and updated_at.
+
+    Returns:
+        Values for every non-vector column, keyed by field name.
+    """
+    metas = [item.metadata or {} for item in items]
+    n = len(items)
+    # token_count is a word count; str.split() runs in C and beats counting
+    # regex matches or NumPy word boundaries, despite the throwaway list
+    return {
+        "text": [item.text for item in items],
+        "source_type": [m.get("source_type", "unknown") for m in metas],
+        "source_file": [m.get("source_file", "unknown") for m in metas],
+        "entity_id": [
+            m["entity_id"] if "entity_id" in m else str(uuid.uuid4()) for m in metas
+        ],
+        "chunk_type": [m.get("chunk_type", "text") for m in metas],
+        "chunk_index": [m.get("chunk_index", 0) for m in metas],
+        "language": [m.get("language", "text") for m in metas],
+        "git_branch": [m.get("git_branch", "main") for m in metas],
+        "token_count": [len(item.text.split()) for item in items],
+        "created_at": [now] * n,
+        "updated_at": [now] * n,
+    }
+
+
 @app.post("/embed")
 async def embed_text(req: EmbedRequest):
     """Embed a single piece of text and store it in LanceDB.
 
+    Concurrent calls are coalesced into one batched model call.
+
     Args:
         req: The EmbedRequest containing text and optional metadata.
 
@@ -207,38 +507,96 @@ async def embed_text(req: EmbedRequest):
         HTTPException: If embedding or storage fails.
     """
     try:
-        if app.state.model:
-            vector = app.state.model.encode(req.text).tolist()
-        else:
-            # Mock vector for tests
-            vector = [0.1] * 384
-
-        table = app.state.lancedb.open_table("embeddings")
-
-        metadata = req.metadata or {}
-
-        record = {
-            "vector": vector,
-            "text": req.text,
-            "source_type": metadata.get("source_type", "unknown"),
-            "source_file": metadata.get("source_file", "unknown"),
-            "entity_id": metadata.get("entity_id", str(uuid.uuid4())),
-            "chunk_type": metadata.get("chunk_type", "text"),
-            "chunk_index": metadata.get("chunk_index", 0),
-            "language": metadata.get("language", "text"),
-            "git_branch": metadata.get("git_branch", "main"),
-            "token_count": len(req.text.split()),  # Rough estimate
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat(),
-        }
+        vector = await app.state.embed_batcher.encode(req.text)
 
-        table.add([record])
-        return {"status": "success", "entity_id": record["entity_id"]}
+        columns = _embed_columns([req], datetime.now(UTC).isoformat())
+        await app.state.table_writer.add(vector[np.newaxis], columns)
+        _schedule_index_refresh(1)
+        return {"status": "success", "entity_id": columns["entity_id"][0]}
     except Exception as e:
         logger.error("Embedding failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/embed_batch")
+async def embed_batch(req: EmbedBatchRequest):
+    """Embed many texts with one model call and one LanceDB append.
+
+    Args:
+        req: The EmbedBatchRequest holding the items to embed.
+
+    Returns:
+        A dictionary with status and the entity_ids in request order.
+
+    Raises:
+        HTTPException: If embedding or storage fails.
+    """
+    if not req.items:
+        return {"status": "success", "entity_ids": []}
+    try:
+        vectors = await encode_texts_async(
+            app.state.model, [item.text for item in req.items]
+        )
+
+        columns = _embed_columns(req.items, datetime.now(UTC).isoformat())
+        await app.state.table_writer.add(vectors, columns)
+        _schedule_index_refresh(len(req.items))
+        return {"status": "success", "entity_ids": columns["entity_id"]}
+    except Exception as e:
+        logger.error("Batch embedding failed: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _ingest_rows(
+    req: IngestRequest, chunks: List[Chunk], now: str
+) -> tuple[List[Dict[str, Any]], Dict[str, list]]:
+    """Build the entity list and table columns for an ingested file.
+
+    Args:
+        req: The IngestRequest the chunks came from.
+        chunks: The file's chunks, one row each.
+        now: ISO timestamp used for created_at and updated_at.
+
+    Returns:
+        The named entities found in the chunks, and values for every
+        non-vector column keyed by field name.
+    """
+    entities: List[Dict[str, Any]] = []
+    for chunk in chunks:
+        is_named_entity = (
+            chunk.entity_name
+            and chunk.chunk_type in (
+                "function", "class", "struct", "enum", "trait", "impl",
+                "interface"
+            )
+        )
+        if is_named_entity:
+            entities.append({
+                "name": chunk.entity_name,
+                "type": chunk.chunk_type,
+                "start_line": chunk.start_line,
+                "end_line": chunk.end_line,
+            })
+
+    n = len(chunks)
+    columns: Dict[str, list] = {
+        "text": [chunk.text for chunk in chunks],
+        "source_type": [req.source_type] * n,
+        "source_file": [req.file_path] * n,
+        "entity_id": [
+            chunk_entity_id(req.file_path, chunk.index, chunk.text) for chunk in chunks
+        ],
+        "chunk_type": [chunk.chunk_type for chunk in chunks],
+        "chunk_index": [chunk.index for chunk in chunks],
+        "language": [req.language] * n,
+        "git_branch": [req.git_branch] * n,
+        "token_count": [len(chunk.text.split()) for chunk in chunks],
+        "created_at": [now] * n,
+        "updated_at": [now] * n,
+    }
+    return entities, columns
+
+
 @app.post("/ingest")
 async def ingest_file(req: IngestRequest):
     """Ingest a full file: chunk, embed, and store in one pass.
@@ -253,62 +611,40 @@ async def ingest_file(req: IngestRequest):
         HTTPException: If ingestion fails.
     """
     try:
-        chunks = chunk_file(req.content, req.language, file_path=req.file_path, source_type=req.source_type)
+        # Parsing is CPU-bound, so it runs on a worker thread while other
+        # requests proceed. The chunker locks its parsers and never edits
+        # a tree it has handed out, so concurrent ingests of one path are safe.
+        chunks = await asyncio.to_thread(
+            chunk_file, req.content, req.language,
+            file_path=req.file_path, source_type=req.source_type,
+        )
         if not chunks:
             return {"chunk_count": 0, "entities": []}
 
-        table = app.state.lancedb.open_table("embeddings")
-        now = datetime.now().isoformat()
-        records = []
-        entities = []
-
-        for chunk in chunks:
-            # Prepend context header to text for richer embeddings
-            embed_text = chunk.text
-            if chunk.context_header:
-                embed_text = chunk.context_header + "\n" + chunk.text
-
-            if app.state.model:
-                vector = app.state.model.encode(embed_text).tolist()
-            else:
-                vector = [0.1] * 384
-
-            records.append({
-                "vector": vector,
-                "text": chunk.text,
-                "source_type": req.source_type,
-                "source_file": req.file_path,
-                "entity_id": str(uuid.uuid4()),
-                "chunk_type": chunk.chunk_type,
-                "chunk_index": chunk.index,
-                "language": req.language,
-                "git_branch": req.git_branch,
-                "token_count": len(chunk.text.split()),
-                "created_at": now,
-                "updated_at": now,
-            })
-
-            is_named_entity = (
-                chunk.entity_name
-                and chunk.chunk_type in (
-                    "function", "class", "struct", "enum", "trait", "impl",
-                    "interface"
-                )
-            )
-            if is_named_entity:
-                entities.append({
-                    "name": chunk.entity_name,
-                    "type": chunk.chunk_type,
-                    "start_line": chunk.start_line,
-                    "end_line": chunk.end_line,
-                })
-
-        table.add(records)
+        # Prepend context header to text for richer embeddings, then encode
+        # every chunk of the file in one batched call. The row metadata is
+        # built on a worker thread while the model runs.
+        embed_texts = [
+            chunk.context_header + "\n" + chunk.text if chunk.context_header else chunk.text
+            for chunk in chunks
+        ]
+        now = datetime.now(UTC).isoformat()
+        encode_task = asyncio.ensure_future(encode_texts_async(app.state.model, embed_texts))
+        rows_task = asyncio.ensure_future(asyncio.to_thread(_ingest_rows, req, chunks, now))
+        try:
+            vectors, (entities, columns) = await asyncio.gather(encode_task, rows_task)
+        finally:
+            # If one side failed, don't leave the other running unobserved
+            encode_task.cancel()
+            rows_task.cancel()
+        n = len(chunks)
+        await app.state.table_writer.add(vectors, columns)
+        _schedule_index_refresh(n)
         logger.info(
             "Ingested %d chunks from %s (%d entities)",
-            len(records), req.file_path, len(entities)
+            n, req.file_path, len(entities)
         )
-        return {"chunk_count": len(records), "entities": entities}
+        return {"chunk_count": n, "entities": entities}
     except Exception as e:
         logger.error("Ingest failed for %s: %s", req.file_path, e)
         raise HTTPException(status_code=500, detail=str(e))
@@ -328,8 +664,8 @@ async def delete_embeddings(source_file: str):
     """
     try:
         source_file = sanitize_filter_value("source_file", source_file)
-        table = app.state.lancedb.open_table("embeddings")
-        table.delete(f"source_file = '{source_file}'")
+        table = app.state.embeddings_table
+        await asyncio.to_thread(table.delete, f"source_file = '{source_file}'")
         logger.info("Deleted embeddings for %s", source_file)
         return {"status": "success", "source_file": source_file}
     except HTTPException:
@@ -339,6 +675,46 @@ async def delete_embeddings(source_file: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _binary_rescored_search(
+    table,
+    vector: np.ndarray,
+    where_clause: Optional[str],
+    limit: int,
+    columns: List[str],
+    nprobes: int = SEARCH_NPROBES,
+) -> pa.Table:
+    """Search on binary codes, then rescore the candidates exactly.
+
+    A Hamming search over vector_bq (through its IVF_FLAT index once one
+    is built, probing `nprobes` partitions) picks
+    limit * SEARCH_BINARY_OVERSAMPLE candidates; their stored vectors are
+    then scored by cosine distance and the best `limit` are kept.
+
+    Returns:
+        The kept rows (the given columns plus _distance), nearest first.
+    """
+    search = (
+        table.search(binary_codes(vector), vector_column_name="vector_bq")
+        .distance_type("hamming")
+        .nprobes(max(nprobes, 1))
+        .limit(max(limit, 1) * SEARCH_BINARY_OVERSAMPLE)
+        .select(columns + ["vector"])
+    )
+    if where_clause:
+        search = search.where(where_clause)
+    hits = search.to_arrow()
+
+    stored = (
+        hits.column("vector").combine_chunks().flatten()
+        .to_numpy().astype(np.float32).reshape(-1, vector.shape[-1])
+    )
+    norms = np.linalg.norm(stored, axis=1) * np.linalg.norm(vector)
+    distance = 1.0 - (stored @ vector) / np.maximum(norms, np.finfo(np.float32).tiny)
+    order = np.argsort(distance, kind="stable")[:limit]
+    hits = hits.drop_columns(["vector", "_distance"]).take(order)
+    return hits.append_column("_distance", pa.array(distance[order], type=pa.float32()))
+
+
 @app.get("/search")
 async def search_embeddings(
     query: str,
@@ -348,6 +724,8 @@ async def search_embeddings(
     chunk_type: Optional[str] = None,
     file_path_prefix: Optional[str] = None,
     git_branch: Optional[str] = None,
+    nprobes: int = SEARCH_NPROBES,
+    refine_factor: int = SEARCH_REFINE_FACTOR,
 ):
     """Search for similar embeddings in LanceDB.
 
@@ -359,20 +737,20 @@ async def search_embeddings(
         chunk_type: Filter by chunk type (function, class, etc.).
         file_path_prefix: Filter by file path prefix.
         git_branch: Filter by git branch.
+        nprobes: IVF partitions to probe once the table is indexed.
+        refine_factor: Re-rank limit * refine_factor candidates with full
+            vectors once the table is indexed.
 
     Returns:
-        A dictionary with search results and the original query.
+        A JSON response with search results and the original query.
 
     Raises:
         HTTPException: If search fails.
     """
     try:
-        if app.state.model:
-            vector = app.state.model.encode(query).tolist()
-        else:
-            vector = [0.1] * 384
+        vector = await app.state.embed_batcher.encode(query)
 
-        table = app.state.lancedb.open_table("embeddings")
+        table = app.state.embeddings_table
 
         # Build filter conditions
         conditions = []
@@ -392,25 +770,40 @@ async def search_embeddings(
             file_path_prefix = sanitize_filter_value("file_path_prefix", file_path_prefix)
             conditions.append(f"source_file LIKE '{file_path_prefix}%'")
 
-        search = table.search(vector).limit(limit)
-        if conditions:
-            where_clause = " AND ".join(conditions)
-            search = search.where(where_clause)
-
-        results = search.to_list()
-
-        # Clean up results and add relevance score
-        for r in results:
-            # LanceDB returns _distance (lower = more similar)
-            distance = r.pop("_distance", None)
-            r.pop("vector", None)
-            # Convert distance to a 0-1 relevance score (1 = most relevant)
-            if distance is not None:
-                r["relevance_score"] = round(max(0.0, 1.0 - distance), 4)
-            else:
-                r["relevance_score"] = 0.0
-
-        return {"results": results, "query": query}
+        # Project away the vector columns so they are never read from storage
+        columns = [
+            field.name for field in table.schema
+            if not pa.types.is_fixed_size_list(field.type)
+        ]
+        where_clause = " AND ".join(conditions) if conditions else None
+        if SEARCH_BINARY and "vector_bq" in table.schema.names:
+            hits = await asyncio.to_thread(
+                _binary_rescored_search, table, vector, where_clause, limit, columns, nprobes
+            )
+        else:
+            search = (
+                table.search(vector, vector_column_name="vector")
+                .distance_type(VECTOR_METRIC)
+                .nprobes(max(nprobes, 1))
+                .refine_factor(max(refine_factor, 1))
+                .limit(limit)
+                .select(columns + ["_distance"])
+            )
+            if where_clause:
+                search = search.where(where_clause)
+            hits = await asyncio.to_thread(search.to_arrow)
+
+        # LanceDB returns _distance (lower = more similar); convert it to a
+        # 0-1 relevance score (1 = most relevant)
+        distance = hits.column("_distance").cast(pa.float64())
+        relevance = pc.round(pc.max_element_wise(pc.subtract(1.0, distance), 0.0), 4)
+        hits = hits.drop_columns(["_distance"]).append_column(
+            "relevance_score", pc.fill_null(relevance, 0.0)
+        )
+
+        # Arrow builds the row dicts in C++ and they hold only JSON-native
+        # values, so they go straight to orjson without jsonable_encoder
+        return ORJSONResponse({"results": hits.to_pylist(), "query": query})
     except HTTPException:
         raise
     except Exception as e:
@@ -426,13 +819,14 @@ async def extract_references_endpoint(req: ExtractReferencesRequest):
         req: The ExtractReferencesRequest containing text and optional known symbols.
 
     Returns:
-        A dictionary with a list of extracted references.
+        A JSON response with a list of extracted references.
     """
-    from dataclasses import asdict
     from cortex_sidecar.reference_extraction import extract_references
 
     refs = extract_references(req.text, req.known_symbols)
-    return {"references": [asdict(r) for r in refs]}
+    # orjson serialises the slotted dataclasses natively; returning the
+    # response directly skips per-field asdict() and jsonable_encoder copies
+    return ORJSONResponse({"references": refs})
 
 
 @app.post("/extract-code-todos")
@@ -443,13 +837,12 @@ async def extract_code_todos_endpoint(req: ExtractCodeTodosRequest):
         req: The ExtractCodeTodosRequest containing source code and optional file path.
 
     Returns:
-        A dictionary with a list of extracted code TODOs.
+        A JSON response with a list of extracted code TODOs.
     """
-    from dataclasses import asdict
     from cortex_sidecar.reference_extraction import extract_code_todos
 
     todos = extract_code_todos(req.source)
-    return {"todos": [asdict(t) for t in todos]}
+    return ORJSONResponse({"todos": todos})
 
 
 @app.post("/extract-terminal-tasks")
@@ -460,13 +853,12 @@ async def extract_terminal_tasks_endpoint(req: ExtractTerminalTasksRequest):
         req: The ExtractTerminalTasksRequest containing terminal output.
 
     Returns:
-        A dictionary with a list of extracted terminal tasks.
+        A JSON response with a list of extracted terminal tasks.
     """
-    from dataclasses import asdict
     from cortex_sidecar.terminal_extraction import extract_terminal_tasks
 
     tasks = extract_terminal_tasks(req.output)
-    return {"tasks": [asdict(t) for t in tasks]}
+    return ORJSONResponse({"tasks": tasks})
 
 
 def main():
@@ -6,8 +6,11 @@ Extracts URLs, file paths, action items, and code symbols from note content.
 import re
 from dataclasses import dataclass
 
+import numpy as np
+from rapidfuzz import fuzz, process
 
-@dataclass
+
+@dataclass(slots=True)
 class ExtractedReference:
     text: str
     ref_type: str  # "code_symbol", "file_path", "url", "action_item"
@@ -18,29 +21,112 @@ class ExtractedReference:
 
 # Regex patterns
 URL_RE = re.compile(r"https?://\S+")
-FILE_PATH_RE = re.compile(
-    r"(?<!\w)"  # Not preceded by a word character
+_FILE_PATH_BODY = (
     r"(?:[a-zA-Z0-9_./-]+/)"  # At least one directory component with /
     r"[a-zA-Z0-9_.-]+"  # Filename
     r"\.[a-zA-Z0-9]{1,10}"  # Extension
     r"(?!\w)"  # Not followed by a word character
 )
+FILE_PATH_RE = re.compile(
+    r"(?<!\w)"  # Not preceded by a word character
+    + _FILE_PATH_BODY
+)
 ACTION_ITEM_RE = re.compile(
     r"\b(TODO|FIXME|HACK|XXX)\b",
     re.IGNORECASE,
 )
 BACKTICK_SYMBOL_RE = re.compile(r"`([^`]+)`")
+# URLs, file paths and action items in one pass, tried in that priority
+# order at each position. Backtick symbols stay a separate pass: a quoted
+# span usually starts before the path or URL it wraps, so leftmost-match
+# fusion would let it shadow those higher-priority references. The only way
+# a path can start before an overlapping URL is by ending in "http(s)" right
+# at its "://", so that case is rejected atomically to keep the URL winning.
+#
+# A path is only tried where a run of path characters can first start one.
+# If a path fails at some start, it fails at every later start in the same
+# run, and after a success the greedy match leaves nothing in the run to
+# find. Trying every "/" or "." in the run, as FILE_PATH_RE's lookbehind
+# alone allows, made long "a/a/a/..." text quadratic. That first start is
+# either the run start, or, when the run is glued to a preceding non-ASCII
+# word ("café/notes/a.md"), the position after its first "." "/" or "-";
+# glued_file_path skips that prefix and captures only the path.
+_FILE_PATH_TAIL = rf"(?>{_FILE_PATH_BODY})(?!(?:(?<=http)|(?<=https))://\S)"
+# Every alternative starts on an ASCII path character, and all but the URL
+# need the previous character to be something other than an ASCII word
+# character. The leading guard checks both once per position, so most
+# mid-word positions are rejected before the alternation is entered.
+_URL_PATH_ACTION_RE = re.compile(
+    r"(?:(?=h)|(?<![a-zA-Z0-9_]))(?=[a-zA-Z0-9_./-])"
+    rf"(?:(?P<url>{URL_RE.pattern})"
+    rf"|(?<![\w./-])(?P<file_path>{_FILE_PATH_TAIL})"
+    rf"|(?<=\w)(?<![a-zA-Z0-9_./-])[a-zA-Z0-9_]*[./-](?P<glued_file_path>{_FILE_PATH_TAIL})"
+    rf"|(?P<action_item>(?i:{ACTION_ITEM_RE.pattern})))"
+)
+# Match group -> (ref_type, confidence)
+_FUSED_REFS = {
+    "url": ("url", 1.0),
+    "file_path": ("file_path", 1.0),
+    "glued_file_path": ("file_path", 1.0),
+    "action_item": ("action_item", 0.9),
+}
+# Minimum fuzz.ratio for a plain token to count as a known symbol
+FUZZY_SYMBOL_CUTOFF = 85
+
+# Upper bound on token x symbol score cells computed per cdist call
+_FUZZY_BLOCK_CELLS = 1 << 20
+
+# Score blocks at least this large are spread across all cores; below it,
+# starting the worker threads costs more than it saves
+_FUZZY_PARALLEL_CELLS = 1 << 16
+
 CODE_TOKEN_RE = re.compile(
     r"(?<!\w)([A-Z][a-zA-Z0-9]+|[a-z]+(?:_[a-z0-9]+)+)(?!\w)"
 )
 
 
-def _overlaps(ref: ExtractedReference, existing: list[ExtractedReference]) -> bool:
-    """Check if a reference overlaps with any existing reference."""
-    for ex in existing:
-        if ref.start < ex.end and ref.end > ex.start:
-            return True
-    return False
+def _is_free(covered: bytearray, start: int, end: int) -> bool:
+    """Check that no accepted reference covers any character in [start, end)."""
+    return covered.find(1, start, end) == -1
+
+
+def _mark(covered: bytearray, start: int, end: int) -> None:
+    """Record [start, end) as covered by an accepted reference."""
+    covered[start:end] = b"\x01" * (end - start)
+
+
+def _claim(covered: bytearray, start: int, end: int) -> bool:
+    """Mark [start, end) as covered unless it overlaps an accepted reference."""
+    if not _is_free(covered, start, end):
+        return False
+    _mark(covered, start, end)
+    return True
+
+
+def _best_symbol_ratios(tokens: set[str], known_symbols: list[str]) -> dict[str, float]:
+    """Score each token against its closest known symbol.
+
+    Scores come from RapidFuzz cdist, which runs the token x symbol loop in
+    C and prunes pairs below FUZZY_SYMBOL_CUTOFF (they score 0). Rows are
+    processed in blocks so the score matrix stays small for large inputs,
+    and large blocks are scored on every core.
+    """
+    unique = list(tokens)
+    rows = max(1, _FUZZY_BLOCK_CELLS // len(known_symbols))
+    best: dict[str, float] = {}
+    for i in range(0, len(unique), rows):
+        block = unique[i:i + rows]
+        cells = len(block) * len(known_symbols)
+        scores = process.cdist(
+            block,
+            known_symbols,
+            scorer=fuzz.ratio,
+            score_cutoff=FUZZY_SYMBOL_CUTOFF,
+            dtype=np.float64,
+            workers=-1 if cells >= _FUZZY_PARALLEL_CELLS else 1,
+        )
+        best.update(zip(block, scores.max(axis=1).tolist()))
+    return best
 
 
 def extract_references(
@@ -65,42 +151,25 @@ def extract_references(
         known_symbols = []
 
     refs: list[ExtractedReference] = []
-
-    # 1. URLs
-    for m in URL_RE.finditer(text):
-        ref = ExtractedReference(
-            text=m.group(),
-            ref_type="url",
-            start=m.start(),
-            end=m.end(),
-            confidence=1.0,
-        )
-        if not _overlaps(ref, refs):
-            refs.append(ref)
-
-    # 2. File paths
-    for m in FILE_PATH_RE.finditer(text):
-        ref = ExtractedReference(
-            text=m.group(),
-            ref_type="file_path",
-            start=m.start(),
-            end=m.end(),
-            confidence=1.0,
-        )
-        if not _overlaps(ref, refs):
-            refs.append(ref)
-
-    # 3. Action items
-    for m in ACTION_ITEM_RE.finditer(text):
-        ref = ExtractedReference(
-            text=m.group(),
-            ref_type="action_item",
-            start=m.start(),
-            end=m.end(),
-            confidence=0.9,
-        )
-        if not _overlaps(ref, refs):
-            refs.append(ref)
+    # One byte per character of text; non-zero where a reference was accepted
+    covered = bytearray(len(text))
+
+    # 1-3. URLs, file paths and action items. Matches of one scan never
+    # overlap, so every match is accepted.
+    for m in _URL_PATH_ACTION_RE.finditer(text):
+        group = m.lastgroup
+        # Every alternative is a named group, so a match always sets one
+        assert group is not None
+        ref_type, confidence = _FUSED_REFS[group]
+        start, end = m.span(group)
+        refs.append(ExtractedReference(
+            text=m.group(group),
+            ref_type=ref_type,
+            start=start,
+            end=end,
+            confidence=confidence,
+        ))
+        _mark(covered, start, end)
 
     # 4. Code symbols — backtick-quoted
     for m in BACKTICK_SYMBOL_RE.finditer(text):
@@ -112,34 +181,28 @@ def extract_references(
             end=m.end(),
             confidence=1.0,
         )
-        if not _overlaps(ref, refs):
+        if _claim(covered, ref.start, ref.end):
             refs.append(ref)
 
     # 4b. Code symbols — fuzzy match against known_symbols
     if known_symbols:
-        from rapidfuzz import fuzz
-
-        for m in CODE_TOKEN_RE.finditer(text):
-            token = m.group(1)
-            ref_candidate = ExtractedReference(
-                text=token,
-                ref_type="code_symbol",
-                start=m.start(),
-                end=m.end(),
-                confidence=0.0,
-            )
-            if _overlaps(ref_candidate, refs):
-                continue
-
-            best_ratio = 0.0
-            for sym in known_symbols:
-                ratio = fuzz.ratio(token, sym)
-                if ratio > best_ratio:
-                    best_ratio = ratio
-
-            if best_ratio >= 85:
-                ref_candidate.confidence = round(best_ratio / 100, 2)
-                refs.append(ref_candidate)
+        candidates = [
+            m for m in CODE_TOKEN_RE.finditer(text)
+            if _is_free(covered, m.start(), m.end())
+        ]
+        best_ratio = _best_symbol_ratios(
+            {m.group(1) for m in candidates}, known_symbols
+        )
+        for m in candidates:
+            ratio = best_ratio[m.group(1)]
+            if ratio >= FUZZY_SYMBOL_CUTOFF:
+                refs.append(ExtractedReference(
+                    text=m.group(1),
+                    ref_type="code_symbol",
+                    start=m.start(),
+                    end=m.end(),
+                    confidence=round(ratio / 100, 2),
+                ))
 
     refs.sort(key=lambda r: r.start)
     return refs
@@ -148,7 +211,7 @@ def extract_references(
 # ─── Code Comment TODO Extraction ────────────────────────────────────
 
 
-@dataclass
+@dataclass(slots=True)
 class CodeTodo:
     text: str           # The TODO/FIXME text after the marker
     marker: str         # "TODO", "FIXME", "HACK", "XXX"
@@ -175,12 +238,14 @@ def extract_code_todos(source: str) -> list[CodeTodo]:
         List of CodeTodo objects found in the source.
     """
     todos: list[CodeTodo] = []
+    # Matches arrive in order, so count newlines only since the previous one
+    line_number, scanned = 1, 0
     for m in CODE_COMMENT_TODO_RE.finditer(source):
         text = m.group("text").strip()
         if not text:
             continue
-        # Compute 1-indexed line number
-        line_number = source[:m.start()].count("\n") + 1
+        line_number += source.count("\n", scanned, m.start())
+        scanned = m.start()
         todos.append(
             CodeTodo(
                 text=text,
@@ -10,6 +10,9 @@ from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 import litellm
+import pyarrow as pa
+
+from cortex_sidecar.embedding import SEARCH_NPROBES, SEARCH_REFINE_FACTOR, VECTOR_METRIC
 
 logger = logging.getLogger("cortex-sidecar")
 
@@ -209,11 +212,8 @@ async def rag_query(req: RagQueryRequest, request: Request):
             },
         )
 
-    table = request.app.state.lancedb.open_table("embeddings")
-    if request.app.state.model:
-        vector = request.app.state.model.encode(req.query).tolist()
-    else:
-        vector = [0.1] * 384
+    table = request.app.state.embeddings_table
+    vector = await request.app.state.embed_batcher.encode(req.query)
 
     conditions: List[str] = []
     if req.source_types:
@@ -227,21 +227,32 @@ async def rag_query(req: RagQueryRequest, request: Request):
         branch = sanitize_filter_value("git_branch", req.git_branch)
         conditions.append(f"git_branch = '{branch}'")
 
-    search = table.search(vector).limit(max(1, min(req.limit, 100)))
+    # Leave the vector columns out of the result rows entirely
+    columns = [
+        field.name for field in table.schema
+        if not pa.types.is_fixed_size_list(field.type)
+    ]
+    search = (
+        table.search(vector, vector_column_name="vector")
+        .distance_type(VECTOR_METRIC)
+        .nprobes(SEARCH_NPROBES)
+        .refine_factor(SEARCH_REFINE_FACTOR)
+        .limit(max(1, min(req.limit, 100)))
+        .select(columns + ["_distance"])
+    )
     if conditions:
         search = search.where(" AND ".join(conditions))
 
-    raw_results = search.to_list()
+    raw_results = await asyncio.to_thread(search.to_list)
     query_tokens = {t.lower() for t in req.query.split() if t.strip()}
     enriched: List[Dict[str, Any]] = []
 
     for row in raw_results:
         distance = row.pop("_distance", None)
-        row.pop("vector", None)
         vector_score = round(max(0.0, 1.0 - distance), 4) if distance is not None else 0.0
 
-        text = row.get("text", "") or ""
-        token_hits = sum(1 for token in query_tokens if token in text.lower())
+        text = (row.get("text", "") or "").lower()
+        token_hits = sum(1 for token in query_tokens if token in text)
         lexical_score = (token_hits / max(len(query_tokens), 1)) if query_tokens else 0.0
 
         if req.mode == "hybrid":
@@ -1,10 +1,12 @@
 """Terminal error extraction — extract actionable tasks from terminal output."""
 
 import re
+from bisect import bisect_right
 from dataclasses import dataclass
+from itertools import accumulate
 
 
-@dataclass
+@dataclass(slots=True)
 class TerminalTask:
     text: str           # Suggested task title
     error_type: str     # "compile_error", "test_failure", "runtime_error"
@@ -37,6 +39,40 @@ RUNTIME_ERROR_PATTERNS = [
     re.compile(r"segfault|segmentation fault", re.IGNORECASE),
 ]
 
+# Every pattern above needs one of these words (in any case), so a line
+# containing none of them cannot match and skips all twelve searches.
+_KEYWORDS = ("error", "fail", "panic", "traceback", "exception", "seg")
+
+
+def _may_match(line: str) -> bool:
+    # re.IGNORECASE also folds a few non-ASCII letters (e.g. "ſ", "ı") onto
+    # ASCII ones, which str.lower() does not; leave those lines to the regexes
+    if not line.isascii():
+        return True
+    lowered = line.lower()
+    return any(keyword in lowered for keyword in _KEYWORDS)
+
+
+def _candidate_lines(output: str) -> list[str]:
+    """Return the lines of output that may match an error pattern, in order."""
+    if not output.isascii():
+        return [line for line in output.splitlines() if _may_match(line)]
+
+    # ASCII lowercasing keeps every offset, so each keyword is located with
+    # str.find over the whole output and mapped back to its line; lines
+    # without a keyword are never visited in Python
+    lines = output.splitlines(keepends=True)
+    ends = list(accumulate(map(len, lines)))
+    lowered = output.lower()
+    hits: set[int] = set()
+    for keyword in _KEYWORDS:
+        pos = lowered.find(keyword)
+        while pos >= 0:
+            index = bisect_right(ends, pos)
+            hits.add(index)
+            pos = lowered.find(keyword, ends[index])
+    return [lines[index] for index in sorted(hits)]
+
 
 def extract_terminal_tasks(output: str) -> list[TerminalTask]:
     """Extract actionable tasks from terminal output.
@@ -52,14 +88,17 @@ def extract_terminal_tasks(output: str) -> list[TerminalTask]:
     """
     tasks: list[TerminalTask] = []
     seen_texts: set[str] = set()
+    # Logs repeat the same error line many times; a repeat can only yield
+    # task texts that are already seen, so it is skipped before any search
+    seen_lines: set[str] = set()
 
     def add_task(text: str, error_type: str, source_text: str, confidence: float) -> None:
         text = text.strip()
-        if not text or text in seen_texts:
-            return
         # Truncate very long texts
         if len(text) > 200:
             text = text[:200] + "..."
+        if not text or text in seen_texts:
+            return
         seen_texts.add(text)
         tasks.append(TerminalTask(
             text=text,
@@ -68,10 +107,11 @@ def extract_terminal_tasks(output: str) -> list[TerminalTask]:
             confidence=confidence,
         ))
 
-    for line in output.splitlines():
+    for line in _candidate_lines(output):
         stripped = line.strip()
-        if not stripped:
+        if not stripped or stripped in seen_lines:
             continue
+        seen_lines.add(stripped)
 
         # Check compile errors (confidence=0.95)
         for pattern in COMPILE_ERROR_PATTERNS:
@@ -39,6 +39,29 @@ def test_embed_endpoint(client):
     assert "status" in response.json()
     assert response.json()["status"] == "success"
 
+def test_embed_batch_endpoint(client):
+    data = {
+        "items": [
+            {"text": "first note", "metadata": {"entity_id": "note-1"}},
+            {"text": "second note", "metadata": {"source_file": "b.md"}},
+        ]
+    }
+    response = client.post("/embed_batch", json=data)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "success"
+    assert len(body["entity_ids"]) == 2
+    assert body["entity_ids"][0] == "note-1"
+
+    results = client.get("/search", params={"query": "note", "limit": 5}).json()["results"]
+    assert {"first note", "second note"} <= {r["text"] for r in results}
+
+
+def test_embed_batch_empty(client):
+    response = client.post("/embed_batch", json={"items": []})
+    assert response.status_code == 200
+    assert response.json()["entity_ids"] == []
+
 def test_search_endpoint(client):
     # First embed something to search
     client.post("/embed", json={"text": "Cortex workspace"})
@@ -51,6 +74,40 @@ def test_search_endpoint(client):
     assert len(response.json()["results"]) > 0
 
 
+def test_search_endpoint_binary_rescore(monkeypatch):
+    import numpy as np
+
+    monkeypatch.setattr("cortex_sidecar.main.SEARCH_BINARY", True)
+    # A fresh table, created with the binary column
+    monkeypatch.setenv("CORTEX_DATA_DIR", str(TEST_DATA_DIR))
+
+    # "sign-match" has every sign of the query (Hamming distance 0) but
+    # points mostly along one axis; "near" flips 20 signs yet is almost
+    # parallel to the query. Hamming order is [sign-match, near]; exact
+    # cosine order, which the rescore must restore, is [near, sign-match].
+    vectors = {"query": np.ones(384, dtype=np.float32)}
+    vectors["sign-match"] = np.full(384, 0.01, dtype=np.float32)
+    vectors["sign-match"][0] = 10.0
+    vectors["near"] = np.ones(384, dtype=np.float32)
+    vectors["near"][:20] = -0.01
+
+    class FakeModel:
+        def encode(self, texts, **kwargs):
+            return np.stack([vectors[t] for t in texts])
+
+    with TestClient(app) as c:
+        assert "vector_bq" in app.state.embeddings_table.schema.names
+        app.state.model = app.state.embed_batcher.model = FakeModel()
+        c.post("/embed_batch", json={"items": [{"text": "sign-match"}, {"text": "near"}]})
+
+        response = c.get("/search", params={"query": "query", "limit": 2})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["text"] for r in results] == ["near", "sign-match"]
+    assert results[0]["relevance_score"] > 0.95 > results[1]["relevance_score"]
+    assert all("vector" not in r and "vector_bq" not in r for r in results)
+
+
 def test_models_endpoint(client):
     response = client.get("/api/v1/models")
     assert response.status_code == 200
@@ -86,3 +143,27 @@ def test_rag_query_endpoint(client):
     assert body["mode"] == "hybrid"
     assert isinstance(body["results"], list)
     assert len(body["results"]) >= 1
+    assert "vector" not in body["results"][0]
+
+
+def test_extraction_endpoints_serialise_dataclasses(client):
+    response = client.post("/extract-code-todos", json={"source": "x = 1  # TODO: tidy up\n"})
+    assert response.status_code == 200
+    assert response.json() == {
+        "todos": [{"text": "tidy up", "marker": "TODO", "line_number": 1, "confidence": 1.0}]
+    }
+
+    response = client.post("/extract-terminal-tasks", json={"output": "FAILED test_a\n"})
+    assert response.json()["tasks"][0]["error_type"] == "test_failure"
+
+    response = client.post("/extract-references", json={"text": "see https://example.com"})
+    assert response.json()["references"][0]["ref_type"] == "url"
+
+
+def test_routes_use_orjson_responses():
+    from fastapi.routing import APIRoute
+    from cortex_sidecar.responses import ORJSONResponse
+
+    routes = [r for r in app.routes if isinstance(r, APIRoute)]
+    assert routes
+    assert all(r.response_class is ORJSONResponse for r in routes)
@@ -0,0 +1,166 @@
+"""Tests for the embedding micro-batcher."""
+
+import asyncio
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from cortex_sidecar.batching import EmbedBatcher, TableWriter
+from cortex_sidecar.embedding import EMBEDDING_DIM
+
+
+class FakeModel:
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    def encode(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        if self.fail:
+            raise ValueError("boom")
+        vectors = np.zeros((len(texts), EMBEDDING_DIM), dtype=np.float32)
+        vectors[:, 0] = [len(t) for t in texts]
+        return vectors
+
+
+def test_concurrent_encodes_share_one_model_call():
+    model = FakeModel()
+
+    async def run():
+        batcher = EmbedBatcher(model, window=0.05)
+        batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.encode("x" * i) for i in range(1, 6)))
+        finally:
+            await batcher.stop()
+
+    vectors = asyncio.run(run())
+    assert len(model.calls) == 1
+    assert sorted(model.calls[0]) == sorted("x" * i for i in range(1, 6))
+    assert [v[0] for v in vectors] == [1, 2, 3, 4, 5]
+
+
+def test_batches_are_capped_at_max_batch():
+    model = FakeModel()
+
+    async def run():
+        batcher = EmbedBatcher(model, max_batch=2, window=0.05)
+        batcher.start()
+        try:
+            await asyncio.gather(*(batcher.encode(str(i)) for i in range(5)))
+        finally:
+            await batcher.stop()
+
+    asyncio.run(run())
+    assert [len(c) for c in model.calls] == [2, 2, 1]
+
+
+def test_repeated_texts_are_served_from_cache():
+    model = FakeModel()
+
+    async def run():
+        batcher = EmbedBatcher(model, window=0.0, cache_size=2)
+        batcher.start()
+        try:
+            first = await batcher.encode("note")
+            again = await batcher.encode("note")
+            await batcher.encode("a")
+            await batcher.encode("note")
+            await batcher.encode("b")  # evicts "a", the least recently used
+            await batcher.encode("a")
+            return first, again
+        finally:
+            await batcher.stop()
+
+    first, again = asyncio.run(run())
+    assert again is first
+    assert not first.flags.writeable
+    assert model.calls == [["note"], ["a"], ["b"], ["a"]]
+
+
+def test_model_errors_propagate_to_callers():
+    model = FakeModel(fail=True)
+
+    async def run():
+        batcher = EmbedBatcher(model, window=0.0)
+        batcher.start()
+        try:
+            await batcher.encode("x")
+        finally:
+            await batcher.stop()
+
+    with pytest.raises(ValueError):
+        asyncio.run(run())
+
+
+class FakeTable:
+    schema = pa.schema([pa.field("text", pa.utf8())])
+
+    def __init__(self):
+        self.adds = []
+
+    def add(self, data):
+        self.adds.append(data)
+
+
+def _build_batch(schema, vectors, columns):
+    assert len(vectors) == len(columns["text"])
+    return pa.RecordBatch.from_pydict(columns, schema=schema)
+
+
+def _rows(*values):
+    return np.zeros((len(values), EMBEDDING_DIM), dtype=np.float32), {"text": list(values)}
+
+
+def test_concurrent_writes_share_one_commit():
+    table = FakeTable()
+
+    async def run():
+        writer = TableWriter(lambda: table, _build_batch, window=0.05)
+        writer.start()
+        try:
+            await asyncio.gather(writer.add(*_rows("a")), writer.add(*_rows("b", "c")))
+        finally:
+            await writer.stop()
+
+    asyncio.run(run())
+    assert len(table.adds) == 1
+    assert sorted(table.adds[0].column("text").to_pylist()) == ["a", "b", "c"]
+
+
+def test_bad_request_only_fails_its_own_caller():
+    table = FakeTable()
+    bad_vectors, _ = _rows("x")
+
+    async def run():
+        writer = TableWriter(lambda: table, _build_batch, window=0.05)
+        writer.start()
+        try:
+            return await asyncio.gather(
+                writer.add(bad_vectors, {"text": [7]}),
+                writer.add(*_rows("good")),
+                return_exceptions=True,
+            )
+        finally:
+            await writer.stop()
+
+    bad, good = asyncio.run(run())
+    assert isinstance(bad, pa.ArrowTypeError)
+    assert good is None
+    assert [t.column("text").to_pylist() for t in table.adds] == [["good"]]
+
+
+def test_writer_commits_when_max_rows_reached():
+    table = FakeTable()
+
+    async def run():
+        writer = TableWriter(lambda: table, _build_batch, max_rows=2, window=10.0)
+        writer.start()
+        try:
+            await writer.add(*_rows("a", "b"))
+        finally:
+            await writer.stop()
+
+    asyncio.run(run())
+    assert [t.num_rows for t in table.adds] == [2]
@@ -62,6 +62,29 @@ def test_chunk_text_no_overlap():
     assert chunks[1].text == "d e f"
 
 
+def test_chunk_text_preserves_inner_whitespace():
+    text = "  def f():\n    return 1\n\nx = f()  "
+    chunks = chunk_text(text, chunk_size=3, overlap=0)
+
+    assert chunks[0].text == "def f():\n    return"
+    assert chunks[1].text == "1\n\nx ="
+    assert chunks[2].text == "f()"
+
+
+def test_chunk_text_unicode_whitespace():
+    text = "alpha\u3000beta\xa0gamma\u2003délta"
+    chunks = chunk_text(text, chunk_size=2, overlap=0)
+
+    assert [c.text for c in chunks] == ["alpha\u3000beta", "gamma\u2003délta"]
+
+
+def test_chunk_text_code_points_above_whitespace_range():
+    # U+3001 is just past the highest whitespace code point (U+3000)
+    chunks = chunk_text("x\u3001y \U0001f600z", chunk_size=1, overlap=0)
+
+    assert [c.text for c in chunks] == ["x\u3001y", "\U0001f600z"]
+
+
 def test_chunk_default_type():
     chunks = chunk_text("hello world", chunk_size=10, overlap=0)
     assert chunks[0].chunk_type == "text"
@@ -201,6 +224,15 @@ class Wrapper extends React.Component {
     assert "Wrapper" in names
 
 
+def test_preload_languages_builds_parsers():
+    from cortex_sidecar import chunking
+
+    chunking.preload_languages()
+    for lang in ("python", "javascript", "typescript", "tsx", "rust"):
+        assert lang in chunking._TS_PARSERS
+        assert lang in chunking._TS_PARSER_LOCKS
+
+
 def test_chunk_code_unsupported_language():
     result = chunk_code("hello", "haskell", file_path="main.hs")
     assert result is None
@@ -229,6 +261,85 @@ def second():
         assert chunk.start_line <= chunk.end_line
 
 
+def test_chunk_code_non_ascii_source():
+    source = '# café notes\n\ndef greet():\n    return "héllo"\n\ndef after():\n    pass\n'
+    chunks = chunk_code(source, "python", file_path="uni.py")
+    assert chunks is not None
+    assert chunks[0].text == "# café notes"
+    assert chunks[1].text == 'def greet():\n    return "héllo"'
+    assert chunks[2].entity_name == "after"
+    assert chunks[2].text == "def after():\n    pass"
+
+
+def test_chunk_code_reuses_cached_tree(monkeypatch):
+    from cortex_sidecar import chunking
+
+    source = "def cached():\n    return 1\n"
+    first = chunk_code(source, "python", file_path="cached.py")
+
+    class FailingParser:
+        def parse(self, *args, **kwargs):
+            raise AssertionError("unchanged content should not be re-parsed")
+
+    monkeypatch.setitem(chunking._TS_PARSERS, "python", FailingParser())
+    second = chunk_code(source, "python", file_path="cached.py")
+    assert second == first
+
+
+def test_chunk_code_incremental_reparse_matches_full_parse():
+    from cortex_sidecar import chunking
+
+    before = "import os\n\ndef first():\n    return 1\n\ndef second():\n    pass\n"
+    after = (
+        "import os\n\ndef first():\n    return 100\n\n"
+        "class Added:\n    pass\n\ndef second():\n    pass\n"
+    )
+    chunk_code(before, "python", file_path="edit.py")
+    incremental = chunk_code(after, "python", file_path="edit.py")
+
+    chunking._TREE_CACHE.clear()
+    full = chunk_code(after, "python", file_path="edit.py")
+    assert incremental == full
+    assert [c.entity_name for c in incremental] == [None, "first", "Added", "second"]
+
+
+def test_chunk_code_concurrent_reingest_of_same_path():
+    import sys
+    import threading
+
+    from cortex_sidecar import chunking
+
+    versions = [
+        "import os\n\n" + "".join(f"def f{i}():\n    return {v}\n\n" for i in range(30))
+        for v in range(4)
+    ]
+    expected = []
+    for source in versions:
+        chunking._TREE_CACHE.clear()
+        expected.append(chunk_code(source, "python", file_path="race.py"))
+
+    # Switch threads often so readers overlap with incremental reparses
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    mismatches = []
+
+    def reingest(offset):
+        for i in range(300):
+            v = (i + offset) % len(versions)
+            if chunk_code(versions[v], "python", file_path="race.py") != expected[v]:
+                mismatches.append(v)
+
+    try:
+        threads = [threading.Thread(target=reingest, args=(k,)) for k in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert mismatches == []
+
+
 # ---------------------------------------------------------------------------
 # Markdown chunking tests
 # ---------------------------------------------------------------------------
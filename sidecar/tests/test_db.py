@@ -3,8 +3,17 @@ import shutil
 from pathlib import Path
 import pytest
 import lancedb
+import numpy as np
 import pyarrow as pa
-from cortex_sidecar.main import get_lancedb_schema, get_data_dir
+from cortex_sidecar.main import (
+    VECTOR_INDEX_MIN_ROWS,
+    build_embedding_batch,
+    ensure_source_file_index,
+    ensure_vector_index,
+    refresh_vector_index,
+    get_data_dir,
+    get_lancedb_schema,
+)
 
 TEST_DATA_DIR = Path("./test_data")
 
@@ -24,7 +33,26 @@ def test_get_lancedb_schema():
     assert isinstance(schema, pa.Schema)
     assert "vector" in schema.names
     assert "text" in schema.names
-    assert schema.field("vector").type.value_type == pa.float32()
+    assert schema.field("vector").type.value_type == pa.float16()
+    assert schema.field("vector").type.list_size == 384
+    assert "vector_bq" not in schema.names
+    for name in ("source_type", "source_file", "chunk_type", "language", "git_branch"):
+        assert schema.field(name).type == pa.utf8()
+
+def test_build_embedding_batch_matches_schema():
+    vectors = np.full((2, 384), 0.5, dtype=np.float32)
+    columns = {
+        name: ["x", "y"] for name in get_lancedb_schema().names if name != "vector"
+    }
+    columns["chunk_index"] = [0, 1]
+    columns["token_count"] = [3, 4]
+
+    for value_type in (pa.float16(), pa.float32()):
+        schema = get_lancedb_schema().set(0, pa.field("vector", pa.list_(value_type, 384)))
+        batch = build_embedding_batch(schema, vectors, columns)
+        assert batch.schema == schema
+        assert batch.num_rows == 2
+        assert batch.column("vector")[1].values[0].as_py() == 0.5
 
 def test_get_data_dir(clean_data_dir):
     data_dir = get_data_dir()
@@ -50,6 +78,7 @@ def test_db_initialization(clean_data_dir):
             
             table = app.state.lancedb.open_table("embeddings")
             assert table.schema == get_lancedb_schema()
+            assert app.state.embeddings_table.name == "embeddings"
 
 def test_main_entry_point(monkeypatch):
     import cortex_sidecar.main
@@ -64,3 +93,76 @@ def test_main_entry_point(monkeypatch):
     # Check if uvicorn.run was called with the expected port
     args, kwargs = mock_run.call_args
     assert kwargs["port"] == 9500
+
+@pytest.mark.parametrize(
+    "index_type, expected", [("ivf_hnsw_sq", "IvfHnswSq"), ("ivf_pq", "IvfPq")]
+)
+def test_ensure_vector_index(clean_data_dir, monkeypatch, index_type, expected):
+    monkeypatch.setattr("cortex_sidecar.main.VECTOR_INDEX_TYPE", index_type)
+    db = lancedb.connect(str(clean_data_dir / "lancedb"))
+    schema = get_lancedb_schema()
+    table = db.create_table("embeddings", schema=schema)
+    assert ensure_vector_index(table) is False
+
+    rows = VECTOR_INDEX_MIN_ROWS
+    vectors = np.random.default_rng(0).random((rows, 384), dtype=np.float32)
+    columns = {name: ["x"] * rows for name in schema.names if name != "vector"}
+    columns["chunk_index"] = list(range(rows))
+    columns["token_count"] = [1] * rows
+    table.add(build_embedding_batch(schema, vectors, columns))
+
+    assert ensure_vector_index(table) is True
+    [index] = table.list_indices()
+    assert index.columns == ["vector"]
+    assert index.index_type == expected
+    assert ensure_vector_index(table) is True
+
+    table.add(build_embedding_batch(schema, vectors[:10], {k: v[:10] for k, v in columns.items()}))
+    refresh_vector_index(table)
+    stats = table.index_stats(table.list_indices()[0].name)
+    assert stats.num_unindexed_rows == 0
+
+
+def test_ensure_source_file_index(clean_data_dir):
+    db = lancedb.connect(str(clean_data_dir / "lancedb"))
+    schema = get_lancedb_schema()
+    table = db.create_table("embeddings", schema=schema)
+    assert ensure_source_file_index(table) is True
+    [index] = table.list_indices()
+    assert index.columns == ["source_file"]
+    assert index.index_type == "BTree"
+    assert ensure_source_file_index(table) is True
+
+    legacy_type = pa.dictionary(pa.int32(), pa.utf8())
+    legacy = db.create_table(
+        "legacy",
+        schema=schema.set(
+            schema.get_field_index("source_file"), pa.field("source_file", legacy_type)
+        ),
+    )
+    assert ensure_source_file_index(legacy) is False
+    assert legacy.list_indices() == []
+
+
+def test_binary_schema_and_index(clean_data_dir, monkeypatch):
+    monkeypatch.setattr("cortex_sidecar.main.SEARCH_BINARY", True)
+    schema = get_lancedb_schema()
+    assert schema.field("vector_bq").type.value_type == pa.uint8()
+    assert schema.field("vector_bq").type.list_size == 48
+
+    db = lancedb.connect(str(clean_data_dir / "lancedb"))
+    table = db.create_table("embeddings", schema=schema)
+    rows = VECTOR_INDEX_MIN_ROWS
+    vectors = np.random.default_rng(0).standard_normal((rows, 384), dtype=np.float32)
+    columns = {name: ["x"] * rows for name in schema.names}
+    columns["chunk_index"] = list(range(rows))
+    columns["token_count"] = [1] * rows
+    batch = build_embedding_batch(schema, vectors, columns)
+    codes = batch.column("vector_bq")[0].values.to_numpy()
+    assert np.array_equal(codes, np.packbits(vectors[0] > 0))
+    table.add(batch)
+
+    assert ensure_vector_index(table) is True
+    types = {tuple(idx.columns): idx.index_type for idx in table.list_indices()}
+    assert types[("vector_bq",)] == "IvfFlat"
+    assert ("vector",) in types
@@ -0,0 +1,78 @@
+"""Tests for the embedding helpers."""
+
+import asyncio
+import threading
+
+import numpy as np
+
+from cortex_sidecar.embedding import EMBEDDING_DIM, encode_texts, encode_texts_async
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, **kwargs):
+        self.calls.append((list(texts), kwargs))
+        self.thread = threading.current_thread().name
+        vectors = np.zeros((len(texts), EMBEDDING_DIM), dtype=np.float32)
+        vectors[:, 0] = np.arange(len(texts))
+        return vectors
+
+
+def test_encode_texts_mock_shape():
+    vectors = encode_texts(None, ["a", "b", "c"])
+    assert vectors.shape == (3, EMBEDDING_DIM)
+    assert vectors.dtype == np.float32
+    assert not vectors.flags.writeable
+    assert np.shares_memory(vectors, encode_texts(None, ["d"]))
+
+
+def test_encode_texts_single_batched_call():
+    model = FakeModel()
+    vectors = encode_texts(model, ["one", "two", "three"])
+    assert vectors.shape == (3, EMBEDDING_DIM)
+    assert len(model.calls) == 1
+    texts, kwargs = model.calls[0]
+    assert texts == ["one", "two", "three"]
+    assert kwargs["batch_size"] > 0
+
+
+def test_encode_texts_deduplicates_identical_texts():
+    model = FakeModel()
+    vectors = encode_texts(model, ["import os", "body", "import os"])
+    assert model.calls[0][0] == ["import os", "body"]
+    assert vectors.shape == (3, EMBEDDING_DIM)
+    assert np.array_equal(vectors[0], vectors[2])
+    assert not np.array_equal(vectors[0], vectors[1])
+
+
+def test_encode_texts_async_runs_off_event_loop():
+    model = FakeModel()
+    vectors = asyncio.run(encode_texts_async(model, ["x", "y"]))
+    assert vectors.shape == (2, EMBEDDING_DIM)
+    assert model.thread.startswith("cortex-embed")
+
+
+def test_load_model_falls_back_to_torch(monkeypatch):
+    import sys
+    import types
+
+    from cortex_sidecar import embedding
+
+    loaded = []
+
+    class FakeSentenceTransformer:
+        def __init__(self, name, device=None, backend="torch", model_kwargs=None):
+            if backend != "torch":
+                raise ImportError("optimum is not installed")
+            loaded.append(name)
+            self.device = types.SimpleNamespace(type="mps")
+
+    fake_module = types.SimpleNamespace(SentenceTransformer=FakeSentenceTransformer)
+    monkeypatch.setitem(sys.modules, "sentence_transformers", fake_module)
+    monkeypatch.setattr(embedding, "EMBED_BACKEND", "onnx")
+
+    model = embedding.load_model()
+    assert isinstance(model, FakeSentenceTransformer)
+    assert loaded == [embedding.EMBED_MODEL_NAME]
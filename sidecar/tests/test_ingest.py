@@ -7,29 +7,32 @@ from pathlib import Path
 import pytest
 from fastapi.testclient import TestClient
 
-# Set test mode before importing app
+# Set test mode before the app is imported
 os.environ["CORTEX_TEST_MODE"] = "1"
 TEST_DATA_DIR = Path("./test_ingest_data")
 os.environ["CORTEX_DATA_DIR"] = str(TEST_DATA_DIR)
 
-from cortex_sidecar.main import app
 
+@pytest.fixture(scope="module")
+def client():
+    # One app startup for the whole module; tests share its table. The
+    # app is imported here so collecting this file does not pull in
+    # lancedb and litellm.
+    from cortex_sidecar.main import app
 
-@pytest.fixture(autouse=True)
-def clean_data_dir():
     if TEST_DATA_DIR.exists():
         shutil.rmtree(TEST_DATA_DIR)
     TEST_DATA_DIR.mkdir(parents=True)
     os.environ["CORTEX_DATA_DIR"] = str(TEST_DATA_DIR)
-    yield
+    with TestClient(app) as c:
+        yield c
     if TEST_DATA_DIR.exists():
         shutil.rmtree(TEST_DATA_DIR)
 
 
-@pytest.fixture
-def client(clean_data_dir):
-    with TestClient(app) as c:
-        yield c
+@pytest.fixture(autouse=True)
+def empty_table(client):
+    client.app.state.embeddings_table.delete("true")
 
 
 def test_ingest_basic(client):
@@ -59,6 +62,41 @@ def test_ingest_empty_content(client):
     assert response.json()["chunk_count"] == 0
 
 
+def test_ingest_metadata_failure_returns_500(client, monkeypatch):
+    """A failure while building rows should fail the request cleanly."""
+    def broken_rows(*args):
+        raise ValueError("bad metadata")
+
+    monkeypatch.setattr("cortex_sidecar.main._ingest_rows", broken_rows)
+    response = client.post("/ingest", json={
+        "file_path": "src/app.py",
+        "content": "def handler():\n    return 1\n",
+        "language": "python",
+    })
+    assert response.status_code == 500
+    assert "bad metadata" in response.json()["detail"]
+
+
+def test_concurrent_ingest_of_same_path(client):
+    """Parallel re-ingests of one file should each see their own chunks."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    def ingest(v):
+        content = "import os\n\n" + "".join(
+            f"def f{i}():\n    return {v}\n\n" for i in range(20)
+        )
+        response = client.post("/ingest", json={
+            "file_path": "src/race.py", "content": content, "language": "python",
+        })
+        return response.json()["entities"]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(ingest, [i % 4 for i in range(40)]))
+    for entities in results:
+        assert [e["name"] for e in entities] == [f"f{i}" for i in range(20)]
+        assert [e["start_line"] for e in entities] == [3 + 3 * i for i in range(20)]
+
+
 def test_ingest_then_search(client):
     """Ingested content should be searchable."""
     client.post("/ingest", json={
@@ -95,6 +133,23 @@ def test_ingest_preserves_metadata(client):
     assert result["git_branch"] == "feature-branch"
 
 
+def test_ingest_entity_ids_are_content_addressed(client):
+    """Re-ingesting identical content should reuse the same entity ids."""
+    data = {
+        "file_path": "lib/stable.py",
+        "content": "def one(): pass\n\ndef two(): pass\n",
+        "language": "python",
+        "source_type": "code",
+    }
+    client.post("/ingest", json=data)
+    client.post("/ingest", json=data)
+
+    response = client.get("/search", params={"query": "one", "limit": 10})
+    ids = [r["entity_id"] for r in response.json()["results"]]
+    assert len(ids) == 4
+    assert len(set(ids)) == 2
+
+
 def test_delete_embeddings(client):
     """DELETE /embeddings should remove all embeddings for a file."""
     # Ingest a file
@@ -55,6 +55,17 @@ class TestFilePathExtraction:
         paths = [r for r in refs if r.ref_type == "file_path"]
         assert len(paths) == 0  # Should be captured as URL instead
 
+    def test_path_glued_to_non_ascii_word(self):
+        text = "see café/notes/plan.md"
+        refs = extract_references(text)
+        assert [(r.text, r.start) for r in refs] == [("notes/plan.md", text.index("notes"))]
+
+    def test_long_slash_run_without_extension(self):
+        # Used to retry the path pattern at every "/" of the run
+        assert extract_references("a/" * 20000) == []
+        refs = extract_references("a/" * 20000 + "b.py")
+        assert [r.end for r in refs] == [40004]
+
 
 class TestActionItemExtraction:
     def test_extracts_todo(self):
@@ -135,6 +146,14 @@ class TestOverlapDedup:
         assert len(urls) == 1
         assert len(paths) == 0
 
+    def test_file_path_takes_precedence_over_backtick(self):
+        refs = extract_references("Open `src/main.rs` first")
+        assert [(r.ref_type, r.text) for r in refs] == [("file_path", "src/main.rs")]
+
+    def test_url_wins_over_path_running_into_it(self):
+        refs = extract_references("see lib/notes.https://example.com now")
+        assert [(r.ref_type, r.text) for r in refs] == [("url", "https://example.com")]
+
     def test_backtick_takes_precedence_over_fuzzy(self):
         text = "Use `SearchPanel` component"
         refs = extract_references(text, known_symbols=["SearchPanel"])
@@ -207,6 +226,11 @@ class TestCodeTodoExtraction:
         assert todos[1].marker == "HACK"
         assert todos[1].line_number == 4
 
+    def test_line_numbers_after_non_ascii_lines(self):
+        source = "# café\n# TODO: first\n\n# FIXME: ☕ second\n#\n# XXX: third\n"
+        todos = extract_code_todos(source)
+        assert [t.line_number for t in todos] == [2, 4, 6]
+
     def test_case_insensitive(self):
         source = "# todo: lower case todo\n# Fixme: mixed case"
         todos = extract_code_todos(source)
@@ -95,6 +95,12 @@ class TestMixedOutput:
         tasks = extract_terminal_tasks(output)
         assert len(tasks) == 0
 
+    def test_case_folded_non_ascii_line(self):
+        # re.IGNORECASE folds "ſ" onto "s", so this still reads as a segfault
+        tasks = extract_terminal_tasks("ſegfault in worker\n")
+        assert len(tasks) == 1
+        assert tasks[0].error_type == "runtime_error"
+
     def test_dedup_identical_errors(self):
         output = (
             "error: cannot find value `x`\n"
@@ -103,6 +109,17 @@ class TestMixedOutput:
         tasks = extract_terminal_tasks(output)
         assert len(tasks) == 1
 
+    def test_dedup_repeated_long_errors(self):
+        line = "error: " + "x" * 300
+        tasks = extract_terminal_tasks(f"{line}\n{line}\n")
+        assert len(tasks) == 1
+        assert tasks[0].text.endswith("...")
+
+    def test_carriage_return_and_form_feed_lines(self):
+        output = "Compiling...\rerror: first\r\nok\x0cFAILED test_b\n"
+        tasks = extract_terminal_tasks(output)
+        assert [t.source_text for t in tasks] == ["error: first", "FAILED test_b"]
+
     def test_empty_output(self):
         tasks = extract_terminal_tasks("")
         assert tasks == []